@@ -0,0 +1,166 @@
+import argparse
+import random
+from pathlib import Path
+
+from src.core.patterns import ESX_TO_QB, QB_TO_ESX
+
+FILLER_LINES = [
+    "local coords = GetEntityCoords(PlayerPedId())",
+    "for i = 1, #Config.Locations do",
+    "    local location = Config.Locations[i]",
+    "end",
+    "if distance < 2.0 then",
+    "    Wait(0)",
+    "else",
+    "    Wait(500)",
+    "-- keep this loop cheap, it runs every frame",
+    "local amount = math.floor(price * quantity)",
+    "TriggerServerEvent('resource:server:update', data)",
+    "RegisterNetEvent('resource:client:refresh', function(data) end)",
+    "local label = ('%s x%d'):format(item.label, item.count)",
+    "print(json.encode(payload))",
+]
+
+QB_COMPAT_CLIENT_LINES = [
+    "exports['qb-core']:DrawText('[E] Open', 'left')",
+    "exports['qb-core']:HideText()",
+    "exports['qb-target']:AddCircleZone('zone', coords, 1.5, { name = 'zone' }, { options = {} })",
+    "exports['qtarget']:AddTargetModel(`prop_atm_01`, { options = {} })",
+    "QBCore.Functions.Progressbar('work', 'Working', 5000, false, true, {}, {}, {}, {})",
+]
+
+QB_COMPAT_SERVER_LINES = [
+    "exports['qb-inventory']:AddItem(source, 'cash_roll', 1, false, {}, 'reward')",
+    "TriggerEvent('qb-log:server:CreateLog', 'bank', 'Deposit', 'green', message)",
+    "local Player = QBCore.Functions.GetPlayer(source)",
+    "local citizenid = Player.PlayerData.citizenid",
+]
+
+MANIFESTS = {
+    "esx": """fx_version 'cerulean'
+game 'gta5'
+
+shared_scripts {
+    '@es_extended/imports.lua',
+    'config.lua',
+}
+client_scripts { 'client/*.lua' }
+server_scripts { '@oxmysql/lib/MySQL.lua', 'server/*.lua' }
+""",
+    "qb": """fx_version 'cerulean'
+game 'gta5'
+
+shared_scripts {
+    '@qb-core/shared/locale.lua',
+    'config.lua',
+}
+client_scripts { 'client/*.lua' }
+server_scripts { '@oxmysql/lib/MySQL.lua', 'server/*.lua' }
+""",
+}
+
+BOOTSTRAP = {
+    "esx": "local ESX = exports['es_extended']:getSharedObject()",
+    "qb": "local QBCore = exports['qb-core']:GetCoreObject()",
+}
+
+
+def _lua_file(
+    rng: random.Random,
+    framework: str,
+    role: str,
+    lines: int,
+    marker_ratio: float,
+) -> str:
+    markers = [old for old, _ in (ESX_TO_QB if framework == "esx" else QB_TO_ESX)]
+    if framework == "qb":
+        markers += QB_COMPAT_CLIENT_LINES if role == "client" else QB_COMPAT_SERVER_LINES
+    out = [BOOTSTRAP[framework], ""]
+    for _ in range(lines):
+        if rng.random() < marker_ratio:
+            marker = rng.choice(markers)
+            out.append(marker if " " in marker or "(" in marker else f"    {marker}(source)")
+        else:
+            out.append(rng.choice(FILLER_LINES))
+    return "\n".join(out) + "\n"
+
+
+def generate_tree(
+    root,
+    framework: str = "esx",
+    resources: int = 20,
+    files_per_resource: int = 6,
+    lines_per_file: int = 200,
+    marker_ratio: float = 0.08,
+    asset_bytes: int = 0,
+    seed: int = 1,
+) -> dict[str, int]:
+    rng = random.Random(seed)
+    root = Path(root)
+    counts = {"resources": resources, "lua_files": 0, "other_files": 0, "bytes": 0}
+
+    for index in range(resources):
+        resource = root / f"{framework}_resource_{index:04d}"
+        for folder in ("client", "server", "stream"):
+            (resource / folder).mkdir(parents=True, exist_ok=True)
+
+        files = {
+            "fxmanifest.lua": MANIFESTS[framework],
+            "config.lua": "Config = {}\nConfig.Locations = {}\n",
+        }
+        for number in range(files_per_resource):
+            role = "client" if number % 2 == 0 else "server"
+            files[f"{role}/{role}_{number}.lua"] = _lua_file(
+                rng, framework, role, lines_per_file, marker_ratio
+            )
+        if framework == "qb":
+            files["install.sql"] = (
+                "CREATE TABLE IF NOT EXISTS `bank_cards` (\n"
+                "  `citizenid` varchar(11) DEFAULT NULL,\n"
+                "  `cardNumber` varchar(16) DEFAULT NULL\n);\n"
+            )
+
+        for relative, content in files.items():
+            path = resource / relative
+            path.write_text(content, encoding="utf-8")
+            counts["bytes"] += len(content.encode("utf-8"))
+            if relative.endswith(".lua"):
+                counts["lua_files"] += 1
+            else:
+                counts["other_files"] += 1
+
+        if asset_bytes:
+            (resource / "stream" / "model.ytd").write_bytes(rng.randbytes(asset_bytes))
+            counts["other_files"] += 1
+            counts["bytes"] += asset_bytes
+
+    return counts
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic ESX or QB resource tree.")
+    parser.add_argument("root")
+    parser.add_argument("--framework", choices=["esx", "qb"], default="esx")
+    parser.add_argument("--resources", type=int, default=20)
+    parser.add_argument("--files", type=int, default=6, help="Lua files per resource")
+    parser.add_argument("--lines", type=int, default=200, help="lines per Lua file")
+    parser.add_argument("--marker-ratio", type=float, default=0.08)
+    parser.add_argument("--asset-bytes", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    print(
+        generate_tree(
+            args.root,
+            args.framework,
+            args.resources,
+            args.files,
+            args.lines,
+            args.marker_ratio,
+            args.asset_bytes,
+            args.seed,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
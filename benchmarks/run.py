@@ -0,0 +1,197 @@
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.generate import generate_tree
+from src import __version__
+from src.core.converter import convert_script, process_folder, scan_leftovers
+from src.core.detection import detect_source_framework
+from src.core.patterns import PATTERNS
+from src.core.profiles import (
+    PROFILE_GENERIC,
+    PROFILE_QB_BANKING_ESX_COMPAT,
+    apply_profile_rewrite,
+)
+
+# name -> (generated framework, direction, profile). The compat profile runs without the
+# pattern table, so "qb-generic" is the one that exercises QB_TO_ESX.
+SETUPS = {
+    "esx": ("esx", "ESX to QB-Core", PROFILE_GENERIC),
+    "qb": ("qb", "QB-Core to ESX", PROFILE_QB_BANKING_ESX_COMPAT),
+    "qb-generic": ("qb", "QB-Core to ESX", PROFILE_GENERIC),
+}
+
+
+def _best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _rates(seconds: float, files: int, size: int) -> dict[str, float]:
+    return {
+        "seconds": round(seconds, 6),
+        "files": files,
+        "bytes": size,
+        "files_per_sec": round(files / seconds, 1) if seconds else 0.0,
+        "mb_per_sec": round(size / seconds / 1e6, 2) if seconds else 0.0,
+    }
+
+
+def run_benchmark(
+    framework: str = "esx",
+    resources: int = 50,
+    files_per_resource: int = 8,
+    lines_per_file: int = 300,
+    repeat: int = 3,
+    parallel: bool = False,
+) -> dict[str, object]:
+    source_framework, direction, profile = SETUPS[framework]
+    patterns = PATTERNS[direction] if profile == PROFILE_GENERIC else []
+    workdir = Path(tempfile.mkdtemp(prefix="converter-bench-"))
+    try:
+        source = workdir / "source"
+        tree = generate_tree(
+            source, source_framework, resources, files_per_resource, lines_per_file
+        )
+        lua_paths = sorted(source.rglob("*.lua"))
+        contents = [
+            (path.relative_to(source).as_posix(), path.read_text("utf-8")) for path in lua_paths
+        ]
+        lua_bytes = sum(len(content.encode("utf-8")) for _, content in contents)
+        files = len(contents)
+
+        rewritten = [
+            apply_profile_rewrite(content, relative, direction, profile)
+            for relative, content in contents
+        ]
+        converted = [convert_script(content, patterns) for content in rewritten]
+
+        stages = {
+            "detect_source_framework": _rates(
+                _best_of(repeat, lambda: detect_source_framework(str(source))), files, lua_bytes
+            ),
+            "apply_profile_rewrite": _rates(
+                _best_of(
+                    repeat,
+                    lambda: [
+                        apply_profile_rewrite(content, relative, direction, profile)
+                        for relative, content in contents
+                    ],
+                ),
+                files,
+                lua_bytes,
+            ),
+            "convert_script": _rates(
+                _best_of(
+                    repeat, lambda: [convert_script(content, patterns) for content in rewritten]
+                ),
+                files,
+                lua_bytes,
+            ),
+            "scan_leftovers": _rates(
+                _best_of(
+                    repeat,
+                    lambda: [scan_leftovers(content, direction, profile) for content in converted],
+                ),
+                files,
+                lua_bytes,
+            ),
+        }
+
+        runs = iter(range(repeat + 1))
+
+        def convert_folder():
+            output = workdir / f"output_{next(runs)}"
+            return process_folder(
+                str(source), str(output), patterns, direction, profile, parallel=parallel
+            )
+
+        stages["process_folder"] = _rates(
+            _best_of(repeat, convert_folder),
+            tree["lua_files"] + tree["other_files"],
+            tree["bytes"],
+        )
+
+        tracemalloc.start()
+        stats = convert_folder()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "converter_version": __version__,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "params": {
+            "framework": framework,
+            "direction": direction,
+            "profile": profile,
+            "resources": resources,
+            "files_per_resource": files_per_resource,
+            "lines_per_file": lines_per_file,
+            "repeat": repeat,
+            "parallel": parallel,
+        },
+        "tree": tree,
+        "stages": stages,
+        "peak_memory_bytes": peak,
+        "stats": {key: value for key, value in stats.items() if key != "review_hints"},
+    }
+
+
+def compare(current: dict, baseline: dict) -> list[str]:
+    lines = []
+    for stage, result in current["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before or not result["seconds"]:
+            continue
+        lines.append(
+            f"{stage:<24} {before['seconds']:>10.4f}s -> {result['seconds']:>10.4f}s "
+            f"({before['seconds'] / result['seconds']:.2f}x)"
+        )
+    return lines
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Measure converter throughput per stage.")
+    parser.add_argument("--framework", choices=sorted(SETUPS), default="esx")
+    parser.add_argument("--resources", type=int, default=50)
+    parser.add_argument("--files", type=int, default=8, help="Lua files per resource")
+    parser.add_argument("--lines", type=int, default=300, help="lines per Lua file")
+    parser.add_argument("--repeat", type=int, default=3, help="best-of repetitions per stage")
+    parser.add_argument("--parallel", action="store_true", help="run process_folder in parallel")
+    parser.add_argument("--output", help="write the JSON result to this file")
+    parser.add_argument("--baseline", help="earlier JSON result to compare against")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(
+        args.framework, args.resources, args.files, args.lines, args.repeat, args.parallel
+    )
+    payload = json.dumps(result, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        for line in compare(result, baseline):
+            print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,31 @@
+import multiprocessing
 import os
-from pathlib import Path
-
-from nicegui import ui, app
+import queue
+import sys
+import threading
 
 from src import __version__
 from src.core.patterns import PATTERNS
-from src.core.converter import process_folder
+from src.core.converter import build_output_folder, process_folder
+from src.core.detection import detect_resource_frameworks, summarize_frameworks
 from src.core.profiles import PROFILE_GENERIC, PROFILE_QB_BANKING_ESX_COMPAT
-from src.ui.components import create_folder_selector, create_conversion_options, create_output_console
-
-
-def detect_source_framework(folder: str) -> str:
-    qb_markers = ["QBCore", "qb-core", "qb-target", "PlayerData", "citizenid"]
-    esx_markers = ["ESX", "es_extended", "xPlayer", "esx:"]
-    qb_hits = 0
-    esx_hits = 0
-
-    for path in Path(folder).rglob("*.lua"):
-        try:
-            content = path.read_text(encoding="utf-8", errors="ignore")
-        except OSError:
-            continue
-        lowered = content.lower()
-        qb_hits += sum(1 for marker in qb_markers if marker.lower() in lowered)
-        esx_hits += sum(1 for marker in esx_markers if marker.lower() in lowered)
-
-    if qb_hits > esx_hits and qb_hits > 0:
-        return "QB-Core"
-    if esx_hits > qb_hits and esx_hits > 0:
-        return "ESX"
-    return "Unknown"
-
-
-def build_output_folder(source_folder: str, direction: str, profile: str) -> str:
-    source = Path(source_folder).resolve()
-    suffix = "esx_to_qb" if direction == "ESX to QB-Core" else "qb_to_esx"
-    if profile == PROFILE_QB_BANKING_ESX_COMPAT and direction == "QB-Core to ESX":
-        suffix = f"{suffix}_banking_compat"
-    base = source.parent / f"{source.name}_{suffix}_converted"
-    candidate = base
-    index = 1
-    while candidate.exists():
-        candidate = source.parent / f"{base.name}_{index}"
-        index += 1
-    return str(candidate)
+from src.core.timing import format_slowest, format_timings
+from src.core.usage import format_usage
+
+# nicegui is imported inside the UI functions so the headless CLI never pays for it.
+
+SLOWEST_SHOWN = 5
 
 
 def setup():
+    from nicegui import app, ui
+
+    from src.ui.components import (
+        create_conversion_options,
+        create_folder_selector,
+        create_output_console,
+    )
+
     ui.add_head_html(
         """
         <link rel="preconnect" href="https://fonts.googleapis.com">
@@ -112,18 +91,54 @@ def setup():
             ui.badge(f"v{__version__}").classes("bg-cyan-700 text-white py-2 px-3")
 
         path_input = create_folder_selector()
-        direction, profile = create_conversion_options()
+        direction, profile, run_options = create_conversion_options()
         add_message, clear_output = create_output_console()
 
+        job: dict[str, object] = {"cancel": None}
+
         with ui.card().classes("w-full app-panel"):
             with ui.row().classes("w-full justify-end gap-2"):
                 ui.button("Convert", on_click=lambda: convert(
-                    path_input, direction, profile, add_message, clear_output
+                    path_input,
+                    direction,
+                    profile,
+                    run_options,
+                    add_message,
+                    clear_output,
+                    job,
                 ), icon="bolt").classes("app-btn app-btn-primary")
+                ui.button(
+                    "Cancel", on_click=lambda: cancel(job, add_message), icon="stop"
+                ).props("flat")
                 ui.button("Exit", on_click=lambda: app.shutdown(), icon="power_settings_new").props("flat")
 
 
-def convert(path_input, direction, profile, add_message, clear_output):
+def cancel(job, add_message):
+    from nicegui import ui
+
+    cancel_event = job.get("cancel")
+    if cancel_event is None:
+        ui.notify("No conversion is running.", type="info")
+        return
+    cancel_event.set()
+    add_message("Cancelling after the current file...", "warning")
+
+
+async def convert(
+    path_input,
+    direction,
+    profile,
+    run_options,
+    add_message,
+    clear_output,
+    job,
+):
+    from nicegui import ui
+
+    if job.get("cancel") is not None:
+        ui.notify("A conversion is already running.", type="warning")
+        return
+
     folder = path_input.value or ""
     if not folder:
         ui.notify("Please select a folder", type="negative")
@@ -136,13 +151,49 @@ def convert(path_input, direction, profile, add_message, clear_output):
     selected = direction.value
     selected_profile = profile.value or PROFILE_GENERIC
     patterns = PATTERNS[selected] if selected_profile == PROFILE_GENERIC else []
-    source_framework = detect_source_framework(folder)
 
     if selected_profile == PROFILE_QB_BANKING_ESX_COMPAT and selected != "QB-Core to ESX":
         ui.notify("Compat Bridge profile is only for QB-Core to ESX direction.", type="warning")
         add_message("Selected profile only supports QB-Core to ESX. Switch direction.", "warning")
         return
 
+    cancel_event = threading.Event()
+    job["cancel"] = cancel_event
+    try:
+        await _run_conversion(
+            folder,
+            selected,
+            selected_profile,
+            patterns,
+            {name: widget.value for name, widget in run_options.items()},
+            add_message,
+            clear_output,
+            cancel_event,
+        )
+    finally:
+        job["cancel"] = None
+
+
+async def _run_conversion(
+    folder,
+    selected,
+    selected_profile,
+    patterns,
+    run_options,
+    add_message,
+    clear_output,
+    cancel_event,
+):
+    from nicegui import run, ui
+
+    resources = await run.io_bound(detect_resource_frameworks, folder)
+    source_framework = summarize_frameworks(resources)
+    expected_framework = "ESX" if selected == "ESX to QB-Core" else "QB-Core"
+    mismatched = [
+        resource for resource, (verdict, _) in resources.items()
+        if verdict not in {expected_framework, "Unknown"}
+    ]
+
     if selected == "ESX to QB-Core" and source_framework == "QB-Core":
         ui.notify("Direction mismatch: source looks QB-Core. Use 'QB-Core to ESX'.", type="warning")
         add_message("Direction mismatch detected. Source appears to be QB-Core.", "warning")
@@ -159,30 +210,82 @@ def convert(path_input, direction, profile, add_message, clear_output):
             "warning",
         )
 
-    output_folder = build_output_folder(folder, selected, selected_profile)
+    output_folder = build_output_folder(
+        folder, selected, selected_profile, reuse_existing=run_options["incremental"]
+    )
 
     clear_output()
     add_message(f"Starting conversion: {selected}", "info")
     add_message(f"Profile: {selected_profile}", "info")
     add_message(f"Detected source framework: {source_framework}", "info")
+    if source_framework == "Mixed":
+        add_message(
+            f"{len(mismatched)} of {len(resources)} resource(s) "
+            f"do not look like {expected_framework}:",
+            "warning",
+        )
+        for resource in mismatched[:5]:
+            verdict, confidence = resources[resource]
+            add_message(f"  {resource}: {verdict} ({confidence:.0%})", "warning")
     add_message(f"Source: {folder}", "info")
     add_message(f"Output: {output_folder}", "info")
-
-    def on_progress(msg: str):
-        if msg.startswith("Converted:"):
-            add_message(msg, "success")
-        elif msg.startswith("Error:"):
-            add_message(msg, "error")
-        else:
-            add_message(msg, "info")
+    if run_options["dry_run"]:
+        add_message("Dry run: converting in memory, nothing will be written.", "info")
+
+    # process_folder runs in a worker thread; its callback only queues messages and the
+    # timer moves them into the console on the event loop.
+    progress: queue.SimpleQueue = queue.SimpleQueue()
+
+    def drain_progress():
+        while True:
+            try:
+                msg = progress.get_nowait()
+            except queue.Empty:
+                return
+            if msg.startswith("Converted:"):
+                add_message(msg, "success")
+            elif msg.startswith("Error:"):
+                add_message(msg, "error")
+            else:
+                add_message(msg, "info")
+
+    progress_timer = ui.timer(0.1, drain_progress)
 
     try:
-        stats = process_folder(folder, output_folder, patterns, selected, selected_profile, on_progress)
+        stats = await run.io_bound(
+            process_folder,
+            folder,
+            output_folder,
+            patterns,
+            selected,
+            selected_profile,
+            progress.put,
+            cancel_event=cancel_event,
+            slowest=SLOWEST_SHOWN if run_options["timings"] else 0,
+            usage=run_options["timings"],
+            **run_options,
+        )
+        progress_timer.cancel()
+        drain_progress()
+
+        if stats.get("cancelled"):
+            add_message("Conversion cancelled; output folder is incomplete.", "warning")
 
         add_message("--- Summary ---", "info")
         add_message(f"Total files: {stats['total']}", "info")
         add_message(f"Converted: {stats['converted']}", "success")
         add_message(f"Skipped: {stats['skipped']}", "info")
+        if run_options["incremental"]:
+            add_message(f"Unchanged since last run: {stats['unchanged']}", "info")
+            add_message(f"Removed from output: {stats['removed']}", "info")
+        if stats.get("linked", 0) > 0:
+            add_message(f"Linked instead of copied: {stats['linked']}", "info")
+        if stats.get("deduped", 0) > 0:
+            add_message(
+                f"Identical copies reused: {stats['deduped']} "
+                f"({stats['dedupe_ratio']:.0%} of converted files)",
+                "info",
+            )
         if stats.get("unsafe_skipped", 0) > 0:
             add_message(
                 f"Unsafe mixed outputs prevented: {stats['unsafe_skipped']} file(s) kept original",
@@ -190,21 +293,56 @@ def convert(path_input, direction, profile, add_message, clear_output):
             )
         if stats["errors"] > 0:
             add_message(f"Errors: {stats['errors']}", "error")
+        if stats.get("timings"):
+            add_message("--- Stage timings ---", "info")
+            for line in format_timings(stats["timings"]):
+                add_message(line, "info")
+        if stats.get("slowest"):
+            add_message("--- Slowest files ---", "info")
+            for line in format_slowest(stats["slowest"]):
+                add_message(line, "info")
+        if stats.get("usage"):
+            add_message("--- Pattern usage ---", "info")
+            for line in format_usage(stats["usage"], SLOWEST_SHOWN):
+                add_message(line, "info")
         if stats.get("flagged", 0) > 0:
             add_message(f"Needs manual review: {stats['flagged']} file(s)", "warning")
             hints = stats.get("review_hints", [])
             for hint in hints[:5]:
                 add_message(f"Review: {hint}", "warning")
 
+        if stats.get("cancelled"):
+            ui.notify("Conversion cancelled.", type="warning")
+            return
+
+        if run_options["dry_run"]:
+            add_message("Dry run: no files were written.", "success")
+            ui.notify("Dry run complete. Nothing was written.", type="positive")
+            return
+
         add_message(f"Output folder ready: {output_folder}", "success")
         add_message("Done.", "success")
         ui.notify(f"Conversion complete. Output: {output_folder}", type="positive", timeout=6000)
     except Exception as e:
+        progress_timer.cancel()
+        drain_progress()
         add_message(f"Fatal error: {e}", "error")
         ui.notify(f"Error: {e}", type="negative")
 
 
 def main():
+    # Spawned pool workers import this file as __mp_main__ with the parent's argv; only
+    # the main process may hand off to the CLI, or each worker would start a run of its
+    # own. __mp_main__ stays for the UI, whose reload worker has to reach ui.run().
+    if len(sys.argv) > 1:
+        if multiprocessing.current_process().name != "MainProcess":
+            return
+        from src.cli import main as cli_main
+
+        raise SystemExit(cli_main(sys.argv[1:]))
+
+    from nicegui import ui
+
     setup()
     ui.run(title="ESX/QB-Core Converter")
 
@@ -0,0 +1,315 @@
+import argparse
+import json
+import os
+import sys
+
+from src import __version__
+from src.core.archive import is_archive
+from src.core.converter import build_output_folder, process_folder
+from src.core.detection import detect_resource_frameworks, summarize_frameworks
+from src.core.diffs import DIFF_MAX_LINES
+from src.core.linking import LINK_COPY, LINK_MODES
+from src.core.patterns import PATTERNS
+from src.core.profiles import PROFILE_GENERIC, PROFILE_QB_BANKING_ESX_COMPAT, PROFILES
+from src.core.profiling import PROFILERS
+from src.core.report import JsonlReport
+from src.core.walk import DEFAULT_EXCLUDES
+from src.core.watch import WATCH_POLL_INTERVAL, watch_folder
+
+DIRECTION_ALIASES = {
+    "esx-to-qb": "ESX to QB-Core",
+    "qb-to-esx": "QB-Core to ESX",
+}
+
+SLOWEST_FILES = 10
+
+PROFILE_ALIASES = {
+    "generic": PROFILE_GENERIC,
+    "compat": PROFILE_QB_BANKING_ESX_COMPAT,
+}
+
+
+def _direction(value: str) -> str:
+    direction = DIRECTION_ALIASES.get(value.lower(), value)
+    if direction not in PATTERNS:
+        raise argparse.ArgumentTypeError(
+            f"unknown direction {value!r} (choose from {', '.join(DIRECTION_ALIASES)})"
+        )
+    return direction
+
+
+def _profile(value: str) -> str:
+    profile = PROFILE_ALIASES.get(value.lower(), value)
+    if profile not in PROFILES:
+        raise argparse.ArgumentTypeError(
+            f"unknown profile {value!r} (choose from {', '.join(PROFILE_ALIASES)})"
+        )
+    return profile
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="fivem-converter",
+        description="Convert FiveM Lua resources between ESX and QB-Core without the web UI.",
+    )
+    parser.add_argument(
+        "source", help="folder or .zip/.tar(.gz|.bz2|.xz) archive containing the resources"
+    )
+    parser.add_argument(
+        "-d",
+        "--direction",
+        type=_direction,
+        required=True,
+        help="esx-to-qb or qb-to-esx",
+    )
+    parser.add_argument(
+        "-p",
+        "--profile",
+        type=_profile,
+        default=PROFILE_GENERIC,
+        help="generic (default) or compat (QB-Core to ESX only)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="output folder, or an archive path ending in .zip/.tar/.tar.gz/.tgz/.tar.bz2/.tar.xz "
+        "(default: <source>_<direction>_converted next to the source)",
+    )
+    parser.add_argument(
+        "--report",
+        default="-",
+        help="where to write the JSON report; '-' for stdout (default)",
+    )
+    parser.add_argument(
+        "--jsonl",
+        metavar="PATH",
+        help="stream one JSON record per converted file to PATH as the run goes, followed by "
+        "a summary record",
+    )
+    parser.add_argument("--parallel", action="store_true", help="convert in a process pool")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="reuse the output folder and only reconvert changed files",
+    )
+    parser.add_argument(
+        "--link-mode",
+        choices=LINK_MODES,
+        default=LINK_COPY,
+        help="how unchanged files are placed in the output",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        metavar="GLOB",
+        help="skip matching files and folders (repeatable; default: "
+        f"{', '.join(DEFAULT_EXCLUDES)})",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="only process files matching one of these globs (repeatable)",
+    )
+    parser.add_argument(
+        "--passthrough",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="place matching folders whole without walking them, e.g. node_modules (repeatable)",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="record per-stage wall time and bytes in the report",
+    )
+    parser.add_argument(
+        "--slowest",
+        type=int,
+        default=SLOWEST_FILES,
+        metavar="N",
+        help=f"list the N slowest files in the report (default: {SLOWEST_FILES}; 0 to skip)",
+    )
+    parser.add_argument(
+        "--profiler",
+        choices=sorted(PROFILERS),
+        help="profile the run: cprofile writes <output>.pstats, sample writes "
+        "<output>.collapsed (flame graph stacks)",
+    )
+    parser.add_argument(
+        "--usage",
+        action="store_true",
+        help="count hits and time for every pattern and profile rule in the report",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="convert in memory only and report what would change; nothing is written",
+    )
+    parser.add_argument(
+        "--diff",
+        metavar="PATH",
+        help="write a unified diff of every file that would change to PATH ('-' for "
+        "stdout); implies --dry-run",
+    )
+    parser.add_argument(
+        "--diff-lines",
+        type=int,
+        default=DIFF_MAX_LINES,
+        metavar="N",
+        help=f"cap each file's diff at N lines (default: {DIFF_MAX_LINES})",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running and re-convert files as they change (Ctrl+C to stop)",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=WATCH_POLL_INTERVAL,
+        metavar="SECONDS",
+        help="rescan interval for --watch without watchfiles installed "
+        f"(default: {WATCH_POLL_INTERVAL:g})",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="convert even if the source looks like the target framework",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress on stderr")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    return parser
+
+
+def _write_report(report: dict[str, object], destination: str) -> None:
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if destination == "-":
+        sys.stdout.write(payload + "\n")
+        return
+    with open(destination, "w", encoding="utf-8") as handle:
+        handle.write(payload + "\n")
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    source_is_archive = is_archive(args.source)
+    if not os.path.isdir(args.source) and not source_is_archive:
+        parser.error(f"not a valid directory or archive: {args.source}")
+    if args.profile == PROFILE_QB_BANKING_ESX_COMPAT and args.direction != "QB-Core to ESX":
+        parser.error("the compat profile only supports qb-to-esx")
+    dry_run = args.dry_run or args.diff is not None
+    if dry_run and args.watch:
+        parser.error("--dry-run and --diff cannot be combined with --watch")
+    if args.profiler and args.watch:
+        parser.error("--profiler cannot be combined with --watch")
+    if args.usage and args.watch:
+        parser.error("--usage cannot be combined with --watch")
+    if args.poll_interval <= 0:
+        parser.error("--poll-interval must be positive")
+    if args.diff == "-" and args.report == "-":
+        parser.error("--diff - needs --report pointed at a file")
+
+    def progress(msg: str) -> None:
+        if not args.quiet:
+            print(msg, file=sys.stderr)
+
+    # Detection samples files on disk; archive sources are not extracted for it.
+    resources = {} if source_is_archive else detect_resource_frameworks(args.source)
+    source_framework = summarize_frameworks(resources)
+    report: dict[str, object] = {
+        "version": __version__,
+        "source": os.path.abspath(args.source),
+        "direction": args.direction,
+        "profile": args.profile,
+        "detected": source_framework,
+        "resources": {
+            resource: {"framework": verdict, "confidence": round(confidence, 3)}
+            for resource, (verdict, confidence) in resources.items()
+        },
+    }
+
+    target_framework = "QB-Core" if args.direction == "ESX to QB-Core" else "ESX"
+    if source_framework == target_framework and not args.force:
+        report["error"] = f"direction mismatch: source appears to be {source_framework}"
+        progress(f"Error: {report['error']} (use --force to convert anyway)")
+        _write_report(report, args.report)
+        return 2
+
+    output = args.output or build_output_folder(
+        args.source,
+        args.direction,
+        args.profile,
+        reuse_existing=args.incremental or args.watch,
+    )
+    report["output"] = None if dry_run else os.path.abspath(output)
+    patterns = PATTERNS[args.direction] if args.profile == PROFILE_GENERIC else []
+    walk_options = {
+        "exclude": DEFAULT_EXCLUDES if args.exclude is None else tuple(args.exclude),
+        "include": tuple(args.include),
+        "passthrough": tuple(args.passthrough),
+    }
+
+    run_report = JsonlReport(args.jsonl) if args.jsonl else None
+    diff_handle = None
+    if args.diff == "-":
+        diff_handle = sys.stdout
+    elif args.diff is not None:
+        diff_handle = open(args.diff, "w", encoding="utf-8")
+
+    def write_diff(_relative_path: str, diff: str) -> None:
+        diff_handle.write(diff)
+
+    try:
+        if args.watch:
+            stats = watch_folder(
+                args.source,
+                output,
+                patterns,
+                args.direction,
+                args.profile,
+                progress,
+                parallel=args.parallel,
+                link_mode=args.link_mode,
+                report=run_report,
+                poll_interval=args.poll_interval,
+                **walk_options,
+            )
+        else:
+            stats = process_folder(
+                args.source,
+                output,
+                patterns,
+                args.direction,
+                args.profile,
+                progress,
+                parallel=args.parallel,
+                incremental=args.incremental,
+                link_mode=args.link_mode,
+                timings=args.timings,
+                dry_run=dry_run,
+                diff_callback=None if diff_handle is None else write_diff,
+                diff_lines=args.diff_lines,
+                report=run_report,
+                slowest=args.slowest,
+                profiler=PROFILERS.get(args.profiler),
+                usage=args.usage,
+                **walk_options,
+            )
+        if run_report is not None:
+            run_report.write({"type": "summary", "stats": stats})
+    finally:
+        if run_report is not None:
+            run_report.close()
+        if diff_handle is not None and diff_handle is not sys.stdout:
+            diff_handle.close()
+    report["stats"] = stats
+    _write_report(report, args.report)
+    return 1 if stats["errors"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
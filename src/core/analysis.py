@@ -0,0 +1,273 @@
+import re
+from array import array
+from bisect import bisect_right
+from functools import cached_property, lru_cache
+
+from src.core.lua_tokens import TOKEN_COMMENT, blank_spans, iter_tokens
+from src.core.matcher import compile_byte_literals, compile_literals
+
+QB_MARKERS = ["QBCore", "qb-core", "qb-target", "PlayerData", "citizenid"]
+ESX_MARKERS = ["ESX", "es_extended", "xPlayer", "esx:"]
+
+CLIENT_HINTS = [
+    "registernuicallback(",
+    "setnuifocus(",
+    "sendnuimessage(",
+    "playerpedid(",
+    "getentitycoords(playerpedid())",
+    "addblipforcoord(",
+    "qbcore.functions.progressbar",
+    "exports['qb-target']",
+    'exports["qb-target"]',
+    "exports['qtarget']",
+    'exports["qtarget"]',
+    "drawtext(",
+    "hidetext()",
+    "combozone:create(",
+    "circlezone:create(",
+]
+
+SERVER_HINTS = [
+    "qbcore.functions.createcallback(",
+    "qbcore.functions.createuseableitem(",
+    "qbcore.commands.add(",
+    "mysql.",
+    "registercommand(",
+    "registerserverevent(",
+    "triggerclientevent(",
+    "exports['qb-inventory']",
+    'exports["qb-inventory"]',
+    "exports(",
+]
+
+
+MIXED_QB_MARKERS = ["qbcore", "qb-core"]
+MIXED_ESX_MARKERS = ["esx", "es_extended"]
+PROFILE_GATE_MARKERS = ["qbcore", "qb-core", "qb-target", "qtarget"]
+
+BASE_VOCABULARY = (
+    QB_MARKERS
+    + ESX_MARKERS
+    + CLIENT_HINTS
+    + SERVER_HINTS
+    + MIXED_QB_MARKERS
+    + MIXED_ESX_MARKERS
+    + PROFILE_GATE_MARKERS
+)
+
+
+def build_vocabulary(*groups) -> tuple[str, ...]:
+    return tuple(sorted({marker.lower() for group in groups for marker in group}))
+
+
+INDEX_VOCABULARY = build_vocabulary(BASE_VOCABULARY)
+
+
+def _ascii_lower(text: str) -> str:
+    # Every marker is ASCII, so only A-Z need lowering. str.lower() can change the length
+    # of the text ("İ" becomes two characters) and shift every offset after it;
+    # bytes.lower() only touches ASCII bytes, so the round trip keeps every offset.
+    if text.isascii():
+        return text.lower()
+    return text.encode("utf-8", "surrogatepass").lower().decode("utf-8", "surrogatepass")
+
+
+@lru_cache(maxsize=None)
+def _prefix_markers(vocabulary: tuple[str, ...]) -> dict[str, list[str]]:
+    # The index matcher tries every position but only reports the longest marker starting
+    # there; a hit for "qbcore.functions.progressbar" also has to count "qbcore" at the
+    # same offset. Markers starting later are found at their own position.
+    return {
+        marker: [other for other in vocabulary if other != marker and marker.startswith(other)]
+        for marker in vocabulary
+    }
+
+
+class FileAnalysis:
+    # Built once per file from a single read; every derived view is computed on first use
+    # and shared by detection, profile rewrites and the leftover checks. Marker queries
+    # run against a comment-free view, indexed by one scan over the vocabulary.
+    def __init__(self, content: str, vocabulary: tuple[str, ...] = INDEX_VOCABULARY):
+        self.content = content
+        self.vocabulary = vocabulary
+
+    @cached_property
+    def lowered(self) -> str:
+        return _ascii_lower(self.content)
+
+    @cached_property
+    def line_starts(self) -> list[int]:
+        starts = [0]
+        find = self.content.find
+        index = find("\n")
+        while index != -1:
+            starts.append(index + 1)
+            index = find("\n", index + 1)
+        return starts
+
+    @cached_property
+    def tokens(self) -> list[tuple[str, int, int]]:
+        # Tokenized on the text the code view is blanked from; lowering keeps every
+        # offset, so the spans index content as well.
+        return list(iter_tokens(self.lowered))
+
+    @cached_property
+    def code(self) -> str:
+        spans = [(start, end) for kind, start, end in self.tokens if kind == TOKEN_COMMENT]
+        return blank_spans(self.lowered, spans)
+
+    @cached_property
+    def marker_positions(self) -> dict[str, list[int]]:
+        positions: dict[str, list[int]] = {}
+        regex = compile_literals(self.vocabulary, overlapping=True)
+        if regex is None:
+            return positions
+        prefixes = _prefix_markers(self.vocabulary)
+        for match in regex.finditer(self.code):
+            marker = match.group(1)
+            start = match.start()
+            positions.setdefault(marker, []).append(start)
+            for prefix in prefixes[marker]:
+                positions.setdefault(prefix, []).append(start)
+        return positions
+
+    def positions(self, marker: str) -> list[int]:
+        needle = marker.lower()
+        if needle in self.vocabulary:
+            return self.marker_positions.get(needle, [])
+        code = self.code
+        found = []
+        offset = code.find(needle)
+        while offset != -1:
+            found.append(offset)
+            offset = code.find(needle, offset + 1)
+        return found
+
+    def has(self, marker: str) -> bool:
+        needle = marker.lower()
+        if needle in self.vocabulary:
+            return needle in self.marker_positions
+        return needle in self.code
+
+    @cached_property
+    def framework_hits(self) -> tuple[int, int]:
+        qb_hits = sum(1 for marker in QB_MARKERS if self.has(marker))
+        esx_hits = sum(1 for marker in ESX_MARKERS if self.has(marker))
+        return qb_hits, esx_hits
+
+    @cached_property
+    def role_hints(self) -> tuple[int, int]:
+        client_hits = sum(1 for hint in CLIENT_HINTS if self.has(hint))
+        server_hits = sum(1 for hint in SERVER_HINTS if self.has(hint))
+        return client_hits, server_hits
+
+    def line_at(self, offset: int) -> int:
+        return bisect_right(self.line_starts, offset)
+
+    def position_at(self, offset: int) -> tuple[int, int]:
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
+
+
+SCAN_CHUNK = 1 << 20
+
+
+class ByteAnalysis:
+    # The marker queries of FileAnalysis over bytes-like content (bytes, bytearray or a
+    # read-only mmap) for large files. Nothing the size of the file is copied: markers are
+    # matched in lowered chunks, hits in comments are dropped by walking the comment spans,
+    # and line/column numbers are worked out per hit. Markers are ASCII, so the results
+    # match the str view.
+    def __init__(self, content, vocabulary: tuple[str, ...] = INDEX_VOCABULARY):
+        self.content = content
+        self.vocabulary = vocabulary
+
+    @cached_property
+    def comment_spans(self) -> tuple[array, array]:
+        starts, ends = array("q"), array("q")
+        for kind, start, end in iter_tokens(self.content):
+            if kind == TOKEN_COMMENT:
+                starts.append(start)
+                ends.append(end)
+        return starts, ends
+
+    def _find(self, regex, width: int):
+        # Each chunk is lowered on its own and read width bytes past its end, so a marker
+        # crossing the boundary is still seen whole; matches come out as one finditer over
+        # the lowered file would give them. Yields (offset, matched bytes) for matches that
+        # do not touch a comment; a lookahead regex reports its first group instead.
+        content = self.content
+        size = len(content)
+        starts, ends = self.comment_spans
+        comment = 0
+        resume = 0
+        for chunk_start in range(0, size, SCAN_CHUNK):
+            chunk_end = min(size, chunk_start + SCAN_CHUNK)
+            piece = content[chunk_start : chunk_end + width].lower()
+            for match in regex.finditer(piece, max(resume - chunk_start, 0)):
+                start = chunk_start + match.start()
+                if start >= chunk_end:
+                    break
+                resume = chunk_start + match.end()
+                found = match.group(match.lastindex or 0)
+                while comment < len(ends) and ends[comment] <= start:
+                    comment += 1
+                if comment < len(starts) and starts[comment] < start + max(len(found), 1):
+                    continue
+                yield start, found
+
+    @cached_property
+    def marker_positions(self) -> dict[str, list[int]]:
+        positions: dict[str, list[int]] = {}
+        regex = compile_byte_literals(self.vocabulary, overlapping=True)
+        if regex is None:
+            return positions
+        prefixes = _prefix_markers(self.vocabulary)
+        width = max(len(marker) for marker in self.vocabulary)
+        for start, found in self._find(regex, width):
+            marker = found.decode("ascii")
+            positions.setdefault(marker, []).append(start)
+            for prefix in prefixes[marker]:
+                positions.setdefault(prefix, []).append(start)
+        return positions
+
+    def positions(self, marker: str) -> list[int]:
+        needle = marker.lower()
+        if needle in self.vocabulary:
+            return self.marker_positions.get(needle, [])
+        if not needle.isascii():
+            return []
+        # A lookahead reports overlapping hits, as str.find does in FileAnalysis.positions.
+        regex = re.compile(b"(?=(" + re.escape(needle.encode("ascii")) + b"))")
+        return [start for start, _ in self._find(regex, len(needle))]
+
+    def has(self, marker: str) -> bool:
+        needle = marker.lower()
+        if needle in self.vocabulary:
+            return needle in self.marker_positions
+        return bool(self.positions(needle))
+
+    def _count_newlines(self, end: int) -> int:
+        content = self.content
+        if isinstance(content, (bytes, bytearray)):
+            return content.count(b"\n", 0, end)
+        # mmap has no count(); a chunk at a time keeps the copies small.
+        return sum(
+            content[start : min(start + SCAN_CHUNK, end)].count(b"\n")
+            for start in range(0, end, SCAN_CHUNK)
+        )
+
+    def line_at(self, offset: int) -> int:
+        return self._count_newlines(offset) + 1
+
+    def position_at(self, offset: int) -> tuple[int, int]:
+        # Columns count characters, as in FileAnalysis, not bytes.
+        line_start = self.content.rfind(b"\n", 0, offset) + 1
+        prefix = self.content[line_start:offset].decode("utf-8", "replace")
+        return self.line_at(offset), len(prefix) + 1
+
+
+def as_analysis(content, vocabulary: tuple[str, ...] = INDEX_VOCABULARY):
+    if isinstance(content, (FileAnalysis, ByteAnalysis)):
+        return content
+    return FileAnalysis(content, vocabulary)
@@ -0,0 +1,401 @@
+import io
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+from time import perf_counter
+
+from src.core.converter import (
+    TargetResult,
+    _diff_preview,
+    _is_target_file,
+    _new_stats,
+    _record_target,
+    _transform_content,
+    dedupe_key,
+)
+from src.core.diffs import DIFF_MAX_LINES, with_header
+from src.core.profiles import PROFILE_GENERIC, profile_extras
+from src.core.report import target_record
+from src.core.timing import NULL_TIMER, StageTimer
+from src.core.usage import NULL_USAGE, PatternUsage, UsageTotals
+from src.core.walk import DEFAULT_EXCLUDES, matches_any, matches_file, scan_tree
+
+ARCHIVE_SUFFIXES = (".tar.gz", ".tar.bz2", ".tar.xz", ".tgz", ".zip", ".tar")
+
+TAR_WRITE_MODES = {
+    ".tar": "w",
+    ".tar.gz": "w:gz",
+    ".tgz": "w:gz",
+    ".tar.bz2": "w:bz2",
+    ".tar.xz": "w:xz",
+}
+
+COPY_CHUNK = 1 << 20
+
+
+def archive_suffix(path) -> str:
+    name = os.fspath(path).lower()
+    for suffix in ARCHIVE_SUFFIXES:
+        if name.endswith(suffix):
+            return suffix
+    return ""
+
+
+def is_archive(path) -> bool:
+    return bool(archive_suffix(path)) and os.path.isfile(path)
+
+
+def _safe_relative(name: str) -> "str | None":
+    # Entry names come from the archive; anything absolute or climbing out of the root is
+    # dropped rather than written. The root itself ("." or "./") comes back empty.
+    parts = [part for part in name.replace("\\", "/").split("/") if part not in ("", ".")]
+    if ".." in parts or name.startswith("/") or (parts and ":" in parts[0]):
+        return None
+    return "/".join(parts)
+
+
+# Entries are (relative name, size, mtime, mode, opener); opener is None for folders and
+# returns a binary stream for files.
+
+
+def _zip_entries(path: str):
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            mtime = time.mktime(info.date_time + (0, 0, -1))
+            mode = (info.external_attr >> 16) & 0o7777 or None
+            if info.is_dir():
+                yield info.filename, 0, mtime, mode, None
+            else:
+                yield info.filename, info.file_size, mtime, mode, (
+                    lambda info=info: archive.open(info)
+                )
+
+
+def _tar_entries(path: str):
+    # Stream mode reads the archive front to back once; each member is consumed before
+    # the next one is requested, so nothing is extracted to disk.
+    with tarfile.open(path, "r|*") as archive:
+        for member in archive:
+            if member.isdir():
+                yield member.name, 0, member.mtime, member.mode, None
+            elif member.isfile():
+                yield member.name, member.size, member.mtime, member.mode, (
+                    lambda member=member: archive.extractfile(member)
+                )
+
+
+def _folder_entries(path: str, exclude, include, passthrough):
+    files, _, passthrough_folders = scan_tree(path, exclude, include, passthrough)
+    for folder in passthrough_folders:
+        files.extend(scan_tree(path, exclude, start=folder)[0])
+    for source_path, relative in sorted(files, key=lambda item: item[1]):
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            # A broken symlink; one bad entry should not abort the whole archive.
+            continue
+        yield relative, stat.st_size, stat.st_mtime, stat.st_mode & 0o7777, (
+            lambda source_path=source_path: open(source_path, "rb")
+        )
+
+
+def _source_entries(source: str, exclude, include, passthrough):
+    suffix = archive_suffix(source)
+    if not suffix:
+        return _folder_entries(source, exclude, include, passthrough)
+    if suffix == ".zip":
+        return _zip_entries(source)
+    return _tar_entries(source)
+
+
+class _FolderSink:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def display(self, relative: str) -> str:
+        return os.path.join(self.root, relative.replace("/", os.sep))
+
+    def add_folder(self, relative: str, mtime: float, mode) -> None:
+        os.makedirs(self.display(relative), exist_ok=True)
+
+    def add_file(self, relative: str, data, size: int, mtime: float, mode) -> None:
+        path = self.display(relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as handle:
+            if isinstance(data, bytes):
+                handle.write(data)
+            else:
+                shutil.copyfileobj(data, handle, COPY_CHUNK)
+
+    def close(self, keep: bool) -> None:
+        pass
+
+
+class _ZipSink:
+    def __init__(self, path: str):
+        self.path = path
+        self.temp_path = f"{path}.tmp"
+        self.archive = zipfile.ZipFile(self.temp_path, "w", zipfile.ZIP_DEFLATED)
+
+    def display(self, relative: str) -> str:
+        return f"{self.path}/{relative}"
+
+    def _info(self, name: str, mtime: float, mode, default_mode: int) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(name, time.localtime(max(mtime, 315532800))[:6])
+        info.external_attr = (mode or default_mode) << 16
+        info.compress_type = zipfile.ZIP_DEFLATED
+        return info
+
+    def add_folder(self, relative: str, mtime: float, mode) -> None:
+        info = self._info(f"{relative}/", mtime, mode, 0o755)
+        info.external_attr |= 0x10
+        self.archive.writestr(info, b"")
+
+    def add_file(self, relative: str, data, size: int, mtime: float, mode) -> None:
+        info = self._info(relative, mtime, mode, 0o644)
+        if isinstance(data, bytes):
+            self.archive.writestr(info, data)
+            return
+        with self.archive.open(info, "w", force_zip64=size > zipfile.ZIP64_LIMIT) as handle:
+            shutil.copyfileobj(data, handle, COPY_CHUNK)
+
+    def close(self, keep: bool) -> None:
+        self.archive.close()
+        if keep:
+            os.replace(self.temp_path, self.path)
+        else:
+            os.unlink(self.temp_path)
+
+
+class _TarSink:
+    def __init__(self, path: str, suffix: str):
+        self.path = path
+        self.temp_path = f"{path}.tmp"
+        self.archive = tarfile.open(self.temp_path, TAR_WRITE_MODES[suffix])
+
+    def display(self, relative: str) -> str:
+        return f"{self.path}/{relative}"
+
+    def _info(self, name: str, size: int, mtime: float, mode, default_mode: int):
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(mtime)
+        info.mode = mode or default_mode
+        return info
+
+    def add_folder(self, relative: str, mtime: float, mode) -> None:
+        info = self._info(relative, 0, mtime, mode, 0o755)
+        info.type = tarfile.DIRTYPE
+        self.archive.addfile(info)
+
+    def add_file(self, relative: str, data, size: int, mtime: float, mode) -> None:
+        if isinstance(data, bytes):
+            size = len(data)
+            data = io.BytesIO(data)
+        self.archive.addfile(self._info(relative, size, mtime, mode, 0o644), data)
+
+    def close(self, keep: bool) -> None:
+        self.archive.close()
+        if keep:
+            os.replace(self.temp_path, self.path)
+        else:
+            os.unlink(self.temp_path)
+
+
+class _NullSink:
+    # Dry runs: same display names, nothing written.
+    def __init__(self, path: str):
+        self.path = path
+
+    def display(self, relative: str) -> str:
+        return f"{self.path}/{relative}"
+
+    def add_folder(self, relative: str, mtime: float, mode) -> None:
+        pass
+
+    def close(self, keep: bool) -> None:
+        pass
+
+
+def _open_sink(destination: str):
+    suffix = archive_suffix(destination)
+    if not suffix:
+        return _FolderSink(destination)
+    parent = os.path.dirname(os.path.abspath(destination))
+    os.makedirs(parent, exist_ok=True)
+    if suffix == ".zip":
+        return _ZipSink(destination)
+    return _TarSink(destination, suffix)
+
+
+def _convert_entry(
+    data: bytes,
+    relative: str,
+    patterns,
+    direction,
+    profile,
+    timer,
+    cache,
+    diff_lines=0,
+    usage=NULL_USAGE,
+):
+    # The cache holds (output, result, diff body); the body is filled in from the cached
+    # output the first time a duplicate asks for it.
+    content = data.decode("utf-8")
+    key = None
+    if cache is not None:
+        key = dedupe_key(content, relative, direction, profile)
+        cached = cache.get(key)
+        if cached is not None:
+            output, result, body = cached
+            if body is None and diff_lines and output is not data:
+                body = _diff_preview(content, output.decode("utf-8"), diff_lines, timer)
+                cache[key] = (output, result, body)
+            return output, result, True, body
+    final_content, result = _transform_content(
+        content, patterns, direction, profile, relative, timer, usage
+    )
+    output = data if final_content == content else final_content.encode("utf-8")
+    if key is not None:
+        cache[key] = (output, result, None)
+    return output, result, False, _diff_preview(content, final_content, diff_lines, timer)
+
+
+def process_archive(
+    source: str,
+    destination: str,
+    patterns: list[tuple[str, str]],
+    direction: str,
+    profile: str = PROFILE_GENERIC,
+    callback=None,
+    cancel_event=None,
+    timings: bool = False,
+    exclude=DEFAULT_EXCLUDES,
+    include=(),
+    passthrough=(),
+    dry_run: bool = False,
+    diff_callback=None,
+    diff_lines: int = DIFF_MAX_LINES,
+    report=None,
+    usage: bool = False,
+) -> dict[str, object]:
+    # Streams a zip/tar archive (or a folder) into a zip/tar archive (or a folder) entry
+    # by entry. Targets are converted in memory, everything else is copied through in
+    # chunks. Archive outputs are written to a temporary file and moved into place at the
+    # end, so a failed or cancelled run never leaves a half-written archive behind.
+    # dry_run, the diff options, report and usage behave as in process_folder.
+    stats = _new_stats()
+    diff_lines = diff_lines if diff_callback is not None else 0
+    if dry_run:
+        stats["dry_run"] = True
+    timer = StageTimer() if timings else NULL_TIMER
+    cache: dict[tuple, tuple] = {}
+    usage_totals = UsageTotals(patterns)
+    converted_entries = 0
+    from_folder = not archive_suffix(source)
+
+    sink = _NullSink(destination) if dry_run else _open_sink(destination)
+    keep = False
+    try:
+        for name, size, mtime, mode, opener in _source_entries(
+            source, exclude, include, passthrough
+        ):
+            if cancel_event is not None and cancel_event.is_set():
+                stats["cancelled"] = True
+                break
+
+            relative = _safe_relative(name)
+            if relative == "" and opener is None:
+                continue
+            if not relative:
+                stats["errors"] += 1
+                if callback:
+                    callback(f"Error: Skipped unsafe archive entry {name!r}")
+                continue
+            if not from_folder and matches_any(relative, exclude):
+                continue
+            if opener is None:
+                sink.add_folder(relative, mtime, mode)
+                continue
+            if not from_folder and include and not matches_file(relative, include):
+                continue
+
+            suffix = os.path.splitext(relative)[1].lower()
+            parent = relative.rpartition("/")[0]
+            in_passthrough = bool(parent) and matches_any(parent, passthrough)
+            if in_passthrough or not _is_target_file(suffix, direction, profile):
+                if dry_run:
+                    continue
+                with opener() as stream:
+                    with timer.stage("copy", size):
+                        sink.add_file(relative, stream, size, mtime, mode)
+                continue
+
+            stats["total"] += 1
+            display = sink.display(relative)
+            start = perf_counter()
+            with opener() as stream:
+                data = stream.read()
+            timer.add("read", perf_counter() - start, len(data))
+            file_usage = PatternUsage() if usage else None
+            try:
+                output, result, deduped, body = _convert_entry(
+                    data,
+                    relative,
+                    patterns,
+                    direction,
+                    profile,
+                    timer,
+                    cache,
+                    diff_lines,
+                    file_usage or NULL_USAGE,
+                )
+            except UnicodeDecodeError as exc:
+                error = f"Failed to read {name}: {exc}"
+                result = TargetResult.failed(error)
+                _record_target(stats, display, result, callback)
+                if report is not None:
+                    report.write(target_record(relative, display, result))
+                continue
+            converted_entries += 1
+            if deduped:
+                stats["deduped"] += 1
+            elif file_usage is not None:
+                usage_totals.add(file_usage)
+            if not dry_run:
+                with timer.stage("write", len(output)):
+                    sink.add_file(relative, output, len(output), mtime, mode)
+            result = TargetResult(*result, deduped=deduped, usage=file_usage)
+            _record_target(stats, display, result, callback)
+            if report is not None:
+                report.write(target_record(relative, display, result))
+            if body is not None:
+                diff_callback(relative, with_header(relative, body))
+
+        if not stats["cancelled"] and not dry_run:
+            now = time.time()
+            with timer.stage("write_profile_extras"):
+                for relative, content in profile_extras(direction, profile):
+                    data = content.encode("utf-8")
+                    sink.add_file(relative, data, len(data), now, None)
+                    if callback:
+                        callback(f"Converted: {sink.display(relative)}")
+        keep = not stats["cancelled"]
+    except (OSError, tarfile.TarError, zipfile.BadZipFile) as exc:
+        stats["errors"] += 1
+        if callback:
+            callback(f"Error: Failed to process archive {source}: {exc}")
+    finally:
+        sink.close(keep)
+
+    stats["dedupe_ratio"] = (
+        round(stats["deduped"] / converted_entries, 3) if converted_entries else 0.0
+    )
+    if timings:
+        stats["timings"] = timer.summary()
+    if usage:
+        stats["usage"] = usage_totals.summary()
+    return stats
@@ -1,14 +1,52 @@
+import hashlib
 import os
 import shutil
+from collections import deque
+from functools import lru_cache, partial
 from pathlib import Path
+from time import perf_counter
+from typing import NamedTuple
 
+from src.core.analysis import (
+    BASE_VOCABULARY,
+    ByteAnalysis,
+    FileAnalysis,
+    as_analysis,
+    build_vocabulary,
+)
+from src.core.diffs import DIFF_MAX_LINES, diff_body, with_header
+from src.core.linking import LINK_COPY, place_file, place_folder, remove_existing
+from src.core.manifest import (
+    build_fingerprint,
+    build_record,
+    is_unchanged,
+    load_manifest,
+    save_manifest,
+)
+from src.core.mapped import LARGE_FILE_BYTES, map_source, write_bytes
+from src.core.matcher import compile_byte_patterns, replace_all, replace_all_bytes
 from src.core.profiles import (
     PROFILE_GENERIC,
     PROFILE_QB_BANKING_ESX_COMPAT,
     apply_profile_rewrite,
+    rewrite_role,
     write_profile_extras,
 )
+from src.core.report import target_record
+from src.core.timing import NULL_TIMER, SlowestFiles, StageTimer
+from src.core.usage import NULL_USAGE, PatternUsage, UsageTotals
+from src.core.walk import (
+    DEFAULT_EXCLUDES,
+    create_folders,
+    matches_any,
+    matches_file,
+    matching_prefix,
+    scan_tree,
+)
 
+# stats["review_hints"] keeps the first hints for display; "flagged" counts them all and a
+# JSONL report carries every file's hits.
+REVIEW_HINT_LIMIT = 20
 
 LEFTOVER_MARKERS = {
     "ESX to QB-Core": ["ESX.", "es_extended", "xPlayer.", "esx:"],
@@ -25,50 +63,70 @@ PROFILE_LEFTOVER_MARKERS = {
 }
 
 
-def convert_script(content: str, patterns: list[tuple[str, str]]) -> str:
-    for old, new in patterns:
-        content = content.replace(old, new)
-    return content
+def convert_script(content: str, patterns: list[tuple[str, str]], counts=None) -> str:
+    return replace_all(content, patterns, counts)
+
+
+def _leftover_markers_for(direction: str, profile: str) -> list[str]:
+    return PROFILE_LEFTOVER_MARKERS.get((direction, profile), LEFTOVER_MARKERS.get(direction, []))
+
+
+@lru_cache(maxsize=None)
+def analysis_vocabulary(direction: str, profile: str) -> tuple[str, ...]:
+    # Base markers plus this run's leftover set: one compiled matcher per (direction,
+    # profile) indexes everything process_file asks of a file in a single scan.
+    return build_vocabulary(BASE_VOCABULARY, _leftover_markers_for(direction, profile))
 
 
-def find_leftover_markers(content: str, direction: str, profile: str) -> list[str]:
-    scoped = PROFILE_LEFTOVER_MARKERS.get((direction, profile))
-    if scoped is not None:
-        lower = content.lower()
-        return [marker for marker in scoped if marker.lower() in lower]
-    lower = content.lower()
-    return [marker for marker in LEFTOVER_MARKERS.get(direction, []) if marker.lower() in lower]
+def scan_leftovers(
+    content,
+    direction: str,
+    profile: str,
+    max_hits: int = 6,
+) -> tuple[list[str], list[tuple[int, int, str]]]:
+    analysis = as_analysis(content, analysis_vocabulary(direction, profile))
+    markers = _leftover_markers_for(direction, profile)
+    leftovers: list[str] = []
+    found: list[tuple[int, int]] = []
+
+    for index, marker in enumerate(markers):
+        offsets = analysis.positions(marker)
+        if offsets:
+            leftovers.append(marker)
+            found.extend((offset, index) for offset in offsets)
+
+    hits: list[tuple[int, int, str]] = []
+    seen: set[tuple[int, int]] = set()
+    for offset, index in sorted(found):
+        if len(hits) >= max_hits:
+            break
+        line, column = analysis.position_at(offset)
+        if (line, index) in seen:
+            continue
+        seen.add((line, index))
+        hits.append((line, column, markers[index]))
+    return leftovers, hits
+
+
+def find_leftover_markers(content, direction: str, profile: str) -> list[str]:
+    return scan_leftovers(content, direction, profile, max_hits=0)[0]
 
 
 def find_marker_hits(
-    content: str,
+    content,
     direction: str,
     profile: str,
     max_hits: int = 6,
-) -> list[tuple[int, str]]:
-    markers = PROFILE_LEFTOVER_MARKERS.get((direction, profile), LEFTOVER_MARKERS.get(direction, []))
-    hits: list[tuple[int, str]] = []
-    seen: set[tuple[int, str]] = set()
-
-    for line_no, line in enumerate(content.splitlines(), start=1):
-        lowered = line.lower()
-        for marker in markers:
-            if marker.lower() in lowered:
-                entry = (line_no, marker)
-                if entry not in seen:
-                    seen.add(entry)
-                    hits.append(entry)
-                    if len(hits) >= max_hits:
-                        return hits
-    return hits
-
-
-def is_mixed_framework_result(content: str, direction: str, profile: str) -> bool:
+) -> list[tuple[int, int, str]]:
+    return scan_leftovers(content, direction, profile, max_hits)[1]
+
+
+def is_mixed_framework_result(content, direction: str, profile: str) -> bool:
     if profile != PROFILE_GENERIC:
         return False
-    lower = content.lower()
-    has_qb = "qbcore" in lower or "qb-core" in lower
-    has_esx = "esx" in lower or "es_extended" in lower
+    analysis = as_analysis(content)
+    has_qb = analysis.has("qbcore") or analysis.has("qb-core")
+    has_esx = analysis.has("esx") or analysis.has("es_extended")
     if direction == "QB-Core to ESX":
         return has_qb and has_esx
     if direction == "ESX to QB-Core":
@@ -76,6 +134,132 @@ def is_mixed_framework_result(content: str, direction: str, profile: str) -> boo
     return False
 
 
+def _byte_size(content) -> int:
+    return len(content.encode("utf-8")) if isinstance(content, str) else len(content)
+
+
+class TargetResult(NamedTuple):
+    # One target file's outcome. The first four fields are the transform result that the
+    # incremental manifest stores; the rest only describe this run.
+    changed: bool
+    leftovers: list[str]
+    unsafe_mixed: bool
+    hits: list[tuple[int, int, str]]
+    error: "str | None" = None
+    records: "list[tuple[str, float, int]] | None" = None
+    deduped: bool = False
+    diff: "str | None" = None
+    usage: "PatternUsage | None" = None
+
+    @classmethod
+    def failed(cls, error: str, records=None, usage=None) -> "TargetResult":
+        return cls(False, [], False, [], error, records, usage=usage)
+
+
+def _reads_raw(patterns: list[tuple[str, str]], profile: str) -> bool:
+    # The bytes path covers the generic profile with an all-ASCII pattern table; profile
+    # rewrites work on decoded text.
+    return profile == PROFILE_GENERIC and compile_byte_patterns(patterns) is not None
+
+
+def _read_source(source_path: str, timer=NULL_TIMER, raw: bool = False):
+    # With raw set, files of LARGE_FILE_BYTES or more come back as bytes-like content
+    # (usually a read-only mmap) instead of str.
+    start = perf_counter()
+    try:
+        if raw and os.path.getsize(source_path) >= LARGE_FILE_BYTES:
+            content = map_source(source_path)
+        else:
+            content = Path(source_path).read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as exc:
+        raise RuntimeError(f"Failed to read {source_path}: {exc}") from exc
+    size = _byte_size(content) if timer is not NULL_TIMER else 0
+    timer.add("read", perf_counter() - start, size)
+    return content
+
+
+def _transform_bytes(
+    content,
+    patterns: list[tuple[str, str]],
+    direction: str,
+    timer=NULL_TIMER,
+    usage=NULL_USAGE,
+):
+    # Generic-profile transform on bytes-like content: one bytes copy for the converted
+    # output (none when nothing matches), and the checks run on that copy in place.
+    size = len(content) if timer is not NULL_TIMER else 0
+    with timer.stage("convert_script", size):
+        start = perf_counter()
+        converted, count = replace_all_bytes(content, patterns, usage.patterns)
+        usage.add_pattern_time(perf_counter() - start)
+        if not count or memoryview(converted) == memoryview(content):
+            converted = content
+    vocabulary = analysis_vocabulary(direction, PROFILE_GENERIC)
+    with timer.stage("mixed_check", size):
+        result = ByteAnalysis(converted, vocabulary)
+        unsafe_mixed = is_mixed_framework_result(result, direction, PROFILE_GENERIC)
+
+    if unsafe_mixed:
+        return content, (False, ["mixed-framework symbols"], True, [])
+    with timer.stage("leftover_scan", size):
+        leftovers, hits = scan_leftovers(result, direction, PROFILE_GENERIC)
+    return converted, (converted is not content, leftovers, False, hits)
+
+
+def _transform_content(
+    content: str,
+    patterns: list[tuple[str, str]],
+    direction: str,
+    profile: str,
+    relative_path: str,
+    timer=NULL_TIMER,
+    usage=NULL_USAGE,
+) -> tuple[str, tuple[bool, list[str], bool, list[tuple[int, int, str]]]]:
+    if not isinstance(content, str):
+        return _transform_bytes(content, patterns, direction, timer, usage)
+    size = len(content.encode("utf-8")) if timer is not NULL_TIMER else 0
+    vocabulary = analysis_vocabulary(direction, profile)
+    source = FileAnalysis(content, vocabulary)
+    with timer.stage("apply_profile_rewrite", size):
+        rewritten = apply_profile_rewrite(source, relative_path, direction, profile, usage)
+    with timer.stage("convert_script", size):
+        start = perf_counter()
+        converted = convert_script(rewritten, patterns, usage.patterns)
+        usage.add_pattern_time(perf_counter() - start)
+    with timer.stage("mixed_check", size):
+        result = source if converted == content else FileAnalysis(converted, vocabulary)
+        unsafe_mixed = is_mixed_framework_result(result, direction, profile)
+
+    if unsafe_mixed:
+        return content, (False, ["mixed-framework symbols"], True, [])
+    with timer.stage("leftover_scan", size):
+        leftovers, hits = scan_leftovers(result, direction, profile)
+    return converted, (converted != content, leftovers, False, hits)
+
+
+def _write_output(
+    source_path: str,
+    destination_path: str,
+    content: str,
+    final_content: str,
+    link_mode: str = LINK_COPY,
+    timer=NULL_TIMER,
+) -> None:
+    size = _byte_size(final_content) if timer is not NULL_TIMER else 0
+    try:
+        with timer.stage("write", size):
+            if link_mode != LINK_COPY and final_content == content:
+                place_file(source_path, destination_path, link_mode)
+            else:
+                remove_existing(destination_path)
+                if isinstance(final_content, str):
+                    Path(destination_path).write_text(final_content, encoding="utf-8")
+                else:
+                    write_bytes(destination_path, final_content)
+    except OSError as exc:
+        raise RuntimeError(f"Failed to write {destination_path}: {exc}") from exc
+
+
 def process_file(
     source_path: str,
     destination_path: str,
@@ -83,134 +267,965 @@ def process_file(
     direction: str,
     profile: str,
     relative_path: str,
-) -> tuple[bool, list[str], bool]:
-    try:
-        content = Path(source_path).read_text(encoding="utf-8")
-    except (OSError, UnicodeDecodeError) as exc:
-        raise RuntimeError(f"Failed to read {source_path}: {exc}") from exc
+    link_mode: str = LINK_COPY,
+    timer=NULL_TIMER,
+) -> tuple[bool, list[str], bool, list[tuple[int, int, str]]]:
+    content = _read_source(source_path, timer, _reads_raw(patterns, profile))
+    final_content, result = _transform_content(
+        content, patterns, direction, profile, relative_path, timer
+    )
+    _write_output(source_path, destination_path, content, final_content, link_mode, timer)
+    return result
+
+
+def dedupe_key(content, relative_path: str, direction: str, profile: str) -> tuple:
+    # Bytes-like content from the large-file path hashes to the same digest as its text.
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    return digest, direction, profile, rewrite_role(relative_path, direction, profile)
 
-    rewritten = apply_profile_rewrite(content, relative_path, direction, profile)
-    converted = convert_script(rewritten, patterns)
-    unsafe_mixed = is_mixed_framework_result(converted, direction, profile)
-    final_content = content if unsafe_mixed else converted
 
+def _place_duplicate(
+    source_path: str,
+    destination_path: str,
+    cached: tuple,
+    link_mode: str,
+    timer=NULL_TIMER,
+) -> None:
+    # Same input, same output: link or copy the first output instead of converting again.
+    # Outputs equal to their input keep linking to their own source.
+    _, first_destination, unchanged = cached[:3]
     try:
-        Path(destination_path).write_text(final_content, encoding="utf-8")
+        with timer.stage("write"):
+            if unchanged and link_mode != LINK_COPY:
+                place_file(source_path, destination_path, link_mode)
+            else:
+                place_file(first_destination, destination_path, link_mode)
     except OSError as exc:
         raise RuntimeError(f"Failed to write {destination_path}: {exc}") from exc
 
-    if unsafe_mixed:
-        return False, ["mixed-framework symbols"], True
-    return converted != content, find_leftover_markers(converted, direction, profile), False
 
+def _diff_preview(content, final_content, diff_lines: int, timer=NULL_TIMER):
+    if not diff_lines or final_content == content:
+        return None
+    with timer.stage("diff"):
+        if not isinstance(content, str):
+            content, final_content = str(content, "utf-8"), str(final_content, "utf-8")
+        return diff_body(content, final_content, diff_lines)
 
-def process_folder(
-    source_folder: str,
-    destination_folder: str,
+
+def _preview_target(
+    content: str,
     patterns: list[tuple[str, str]],
     direction: str,
-    profile: str = PROFILE_GENERIC,
-    callback=None,
-) -> dict[str, object]:
-    stats = {
+    profile: str,
+    relative_path: str,
+    diff_lines: int,
+    timer=NULL_TIMER,
+    cache=None,
+    usage=NULL_USAGE,
+):
+    # Dry runs stop after the transform; the cache maps dedupe_key() to (result, diff
+    # body) instead. A diff is only built when asked for and the output differs. The body
+    # is cached only once a duplicate needs it, so unique files do not keep theirs.
+    key = None
+    if cache is not None:
+        with timer.stage("dedupe"):
+            key = dedupe_key(content, relative_path, direction, profile)
+        cached = cache.get(key)
+        if cached is not None:
+            result, body = cached
+            if body is None and diff_lines and result[0]:
+                final_content, _ = _transform_content(
+                    content, patterns, direction, profile, relative_path, timer
+                )
+                body = _diff_preview(content, final_content, diff_lines, timer)
+                cache[key] = (result, body)
+            return result, body and with_header(relative_path, body), True
+    final_content, result = _transform_content(
+        content, patterns, direction, profile, relative_path, timer, usage
+    )
+    body = _diff_preview(content, final_content, diff_lines, timer)
+    if key is not None:
+        cache[key] = (result, None)
+    return result, body and with_header(relative_path, body), False
+
+
+def convert_target(
+    source_path: str,
+    destination_path: str,
+    patterns: list[tuple[str, str]],
+    direction: str,
+    profile: str,
+    relative_path: str,
+    link_mode: str = LINK_COPY,
+    timings: bool = False,
+    cache=None,
+    dry_run: bool = False,
+    diff_lines: int = 0,
+    usage: bool = False,
+):
+    # cache maps dedupe_key() to (result, first destination, output == input) for the
+    # length of a run; pass None to convert every file on its own. Results end with the
+    # file's diff, which only dry runs with diff_lines set produce, and with usage its
+    # PatternUsage (duplicates reuse a conversion and count nothing).
+    timer = StageTimer() if timings else NULL_TIMER
+    records = timer.records if timings else None
+    file_usage = PatternUsage() if usage else None
+    try:
+        content = _read_source(source_path, timer, _reads_raw(patterns, profile))
+        if dry_run:
+            result, diff, deduped = _preview_target(
+                content,
+                patterns,
+                direction,
+                profile,
+                relative_path,
+                diff_lines,
+                timer,
+                cache,
+                file_usage or NULL_USAGE,
+            )
+            return TargetResult(*result, None, records, deduped, diff, file_usage)
+        key = None
+        if cache is not None:
+            with timer.stage("dedupe"):
+                key = dedupe_key(content, relative_path, direction, profile)
+            cached = cache.get(key)
+            if cached is not None:
+                _place_duplicate(source_path, destination_path, cached, link_mode, timer)
+                return TargetResult(*cached[0], None, records, True, usage=file_usage)
+        final_content, result = _transform_content(
+            content, patterns, direction, profile, relative_path, timer, file_usage or NULL_USAGE
+        )
+        _write_output(source_path, destination_path, content, final_content, link_mode, timer)
+    except RuntimeError as exc:
+        return TargetResult.failed(str(exc), records, file_usage)
+    if key is not None:
+        cache[key] = (result, destination_path, final_content == content)
+    return TargetResult(*result, None, records, usage=file_usage)
+
+
+PIPELINE_READERS = 4
+PIPELINE_WRITERS = 2
+PIPELINE_WINDOW = 16
+
+
+def _read_job(source_path: str, timings: bool, raw: bool):
+    timer = StageTimer() if timings else NULL_TIMER
+    try:
+        return timer, _read_source(source_path, timer, raw), None
+    except RuntimeError as exc:
+        return timer, None, str(exc)
+
+
+def _write_job(
+    job: tuple[str, str, str],
+    content: str,
+    final_content: str,
+    result: tuple,
+    link_mode: str,
+    timer,
+    records,
+    file_usage=None,
+):
+    source_path, destination_path, _ = job
+    try:
+        _write_output(source_path, destination_path, content, final_content, link_mode, timer)
+    except RuntimeError as exc:
+        return TargetResult.failed(str(exc), records, file_usage)
+    return TargetResult(*result, None, records, usage=file_usage)
+
+
+def _write_duplicate_job(
+    job: tuple[str, str, str],
+    content: str,
+    cached: tuple,
+    patterns: list[tuple[str, str]],
+    direction: str,
+    profile: str,
+    link_mode: str,
+    timer,
+    records,
+    file_usage=None,
+):
+    # The first copy was submitted earlier, so a writer thread already owns it; waiting on
+    # it here cannot deadlock the pool.
+    source_path, destination_path, relative_path = job
+    result, _, _, first_write = cached
+    if first_write.result()[4] is None:
+        try:
+            _place_duplicate(source_path, destination_path, cached, link_mode, timer)
+        except RuntimeError as exc:
+            return TargetResult.failed(str(exc), records, file_usage)
+        return TargetResult(*result, None, records, True, usage=file_usage)
+    final_content, result = _transform_content(
+        content, patterns, direction, profile, relative_path, timer, file_usage or NULL_USAGE
+    )
+    return _write_job(
+        job, content, final_content, result, link_mode, timer, records, file_usage
+    )
+
+
+def _submit_write(
+    writers,
+    cache: dict[tuple, tuple],
+    job: tuple[str, str, str],
+    content: str,
+    patterns: list[tuple[str, str]],
+    direction: str,
+    profile: str,
+    link_mode: str,
+    timer,
+    records,
+    file_usage=None,
+):
+    with timer.stage("dedupe"):
+        key = dedupe_key(content, job[2], direction, profile)
+    cached = cache.get(key)
+    if cached is not None:
+        return writers.submit(
+            _write_duplicate_job,
+            job,
+            content,
+            cached,
+            patterns,
+            direction,
+            profile,
+            link_mode,
+            timer,
+            records,
+            file_usage,
+        )
+    final_content, result = _transform_content(
+        content, patterns, direction, profile, job[2], timer, file_usage or NULL_USAGE
+    )
+    write = writers.submit(
+        _write_job, job, content, final_content, result, link_mode, timer, records, file_usage
+    )
+    cache[key] = (result, job[1], final_content == content, write)
+    return write
+
+
+def _pipelined_results(
+    jobs: list[tuple[str, str, str]],
+    patterns: list[tuple[str, str]],
+    direction: str,
+    profile: str,
+    link_mode: str,
+    timings: bool,
+    dry_run: bool = False,
+    diff_lines: int = 0,
+    usage: bool = False,
+):
+    # Reader threads prefetch up to PIPELINE_WINDOW files ahead, the calling thread runs
+    # the transforms, and writer threads flush the results. Both windows are bounded, so
+    # at most two windows of file contents are held at once; results come out in job order.
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+    readers = ThreadPoolExecutor(max_workers=PIPELINE_READERS)
+    writers = ThreadPoolExecutor(max_workers=PIPELINE_WRITERS)
+    cache: dict[tuple, tuple] = {}
+    raw = _reads_raw(patterns, profile)
+    pending = iter(jobs)
+    reads: deque = deque()
+    writes: deque = deque()
+
+    def prefetch() -> None:
+        job = next(pending, None)
+        if job is not None:
+            reads.append((job, readers.submit(_read_job, job[0], timings, raw)))
+
+    try:
+        for _ in range(PIPELINE_WINDOW):
+            prefetch()
+        while reads:
+            job, read = reads.popleft()
+            prefetch()
+            timer, content, error = read.result()
+            records = timer.records if timings else None
+            file_usage = PatternUsage() if usage else None
+            if error is not None:
+                write: Future = Future()
+                write.set_result(TargetResult.failed(error, records, file_usage))
+            elif dry_run:
+                result, diff, deduped = _preview_target(
+                    content,
+                    patterns,
+                    direction,
+                    profile,
+                    job[2],
+                    diff_lines,
+                    timer,
+                    cache,
+                    file_usage or NULL_USAGE,
+                )
+                write = Future()
+                write.set_result(TargetResult(*result, None, records, deduped, diff, file_usage))
+            else:
+                write = _submit_write(
+                    writers,
+                    cache,
+                    job,
+                    content,
+                    patterns,
+                    direction,
+                    profile,
+                    link_mode,
+                    timer,
+                    records,
+                    file_usage,
+                )
+            writes.append(write)
+            while writes and (len(writes) > PIPELINE_WINDOW or writes[0].done()):
+                yield writes.popleft().result()
+        while writes:
+            yield writes.popleft().result()
+    finally:
+        readers.shutdown(cancel_futures=True)
+        writers.shutdown()
+
+
+_WORKER_CONTEXT: tuple = ()
+_WORKER_CACHE: dict[tuple, tuple] = {}
+
+
+def _init_worker(
+    patterns: list[tuple[str, str]],
+    direction: str,
+    profile: str,
+    link_mode: str,
+    timings: bool,
+    dry_run: bool = False,
+    diff_lines: int = 0,
+    usage: bool = False,
+) -> None:
+    global _WORKER_CONTEXT
+    _WORKER_CONTEXT = (patterns, direction, profile, link_mode, timings, dry_run, diff_lines, usage)
+    # Each worker dedupes the files it is handed; copies split across workers are
+    # converted once per worker.
+    _WORKER_CACHE.clear()
+
+
+def _convert_in_worker(job: tuple[str, str, str]):
+    patterns, direction, profile, link_mode, timings, dry_run, diff_lines, usage = _WORKER_CONTEXT
+    source_path, destination_path, relative_path = job
+    return convert_target(
+        source_path,
+        destination_path,
+        patterns,
+        direction,
+        profile,
+        relative_path,
+        link_mode,
+        timings,
+        _WORKER_CACHE,
+        dry_run,
+        diff_lines,
+        usage,
+    )
+
+
+def _is_target_file(suffix: str, direction: str, profile: str) -> bool:
+    is_profile_sql = (
+        profile == PROFILE_QB_BANKING_ESX_COMPAT
+        and direction == "QB-Core to ESX"
+        and suffix == ".sql"
+    )
+    return suffix == ".lua" or is_profile_sql
+
+
+def _collect_entries(
+    source_root: str,
+    destination_root: str,
+    direction: str,
+    profile: str,
+    exclude=DEFAULT_EXCLUDES,
+    include=(),
+    passthrough=(),
+    start: str = "",
+    create: bool = True,
+) -> tuple[list[tuple[str, str, str, bool]], list[str]]:
+    # start limits the walk to one subfolder; paths stay relative to source_root. Output
+    # folders are created here once instead of per file, unless create is False.
+    files, folders, passthrough_folders = scan_tree(
+        source_root, exclude, include, passthrough, start
+    )
+    if create:
+        create_folders(destination_root, folders)
+    entries = [
+        (
+            source_path,
+            os.path.join(destination_root, relative.replace("/", os.sep)),
+            relative,
+            _is_target_file(os.path.splitext(relative)[1].lower(), direction, profile),
+        )
+        for source_path, relative in files
+    ]
+    return entries, passthrough_folders
+
+
+def _build_entry(
+    source_root: str,
+    destination_root: str,
+    relative: str,
+    direction: str,
+    profile: str,
+) -> tuple[str, str, str, bool]:
+    native = relative.replace("/", os.sep)
+    destination_path = os.path.join(destination_root, native)
+    create_folders(destination_root, [relative.rpartition("/")[0]])
+    is_target_file = _is_target_file(os.path.splitext(relative)[1].lower(), direction, profile)
+    return os.path.join(source_root, native), destination_path, relative, is_target_file
+
+
+def _place_passthrough(
+    stats: dict[str, object],
+    source_root: str,
+    destination_root: str,
+    relative: str,
+    link_mode: str,
+    callback,
+) -> None:
+    native = relative.replace("/", os.sep)
+    destination_path = os.path.join(destination_root, native)
+    try:
+        create_folders(destination_root, [relative.rpartition("/")[0]])
+        place_folder(os.path.join(source_root, native), destination_path, link_mode)
+    except (OSError, shutil.Error) as exc:
+        stats["errors"] += 1
+        if callback:
+            callback(f"Error: Failed to place {destination_path}: {exc}")
+        return
+    stats["passthrough"] += 1
+
+
+def _new_stats() -> dict[str, object]:
+    return {
         "total": 0,
         "converted": 0,
         "skipped": 0,
         "errors": 0,
         "flagged": 0,
         "unsafe_skipped": 0,
+        "unchanged": 0,
+        "removed": 0,
+        "linked": 0,
+        "passthrough": 0,
+        "deduped": 0,
+        "cancelled": False,
         "review_hints": [],
     }
-    source_root = Path(source_folder)
-    destination_root = Path(destination_folder)
 
-    destination_root.mkdir(parents=True, exist_ok=True)
 
-    for root, _, files in os.walk(source_folder):
-        for name in files:
-            source_path = Path(root) / name
-            relative_path = source_path.relative_to(source_root)
-            destination_path = destination_root / relative_path
-            destination_path.parent.mkdir(parents=True, exist_ok=True)
+def _place_asset(
+    stats: dict[str, object],
+    source_path: Path,
+    destination_path: Path,
+    link_mode: str,
+    callback,
+    timer=NULL_TIMER,
+) -> bool:
+    try:
+        with timer.stage("copy", os.path.getsize(source_path) if timer is not NULL_TIMER else 0):
+            if place_file(source_path, destination_path, link_mode) != LINK_COPY:
+                stats["linked"] += 1
+    except OSError as exc:
+        stats["errors"] += 1
+        if callback:
+            callback(f"Error: Failed to copy {source_path}: {exc}")
+        return False
+    return True
 
-            suffix = source_path.suffix.lower()
-            is_profile_sql = (
-                profile == PROFILE_QB_BANKING_ESX_COMPAT
-                and direction == "QB-Core to ESX"
-                and suffix == ".sql"
+
+def _record_target(
+    stats: dict[str, object], destination_path: Path, result: TargetResult, callback
+) -> None:
+    if result.error is not None:
+        stats["errors"] += 1
+        if callback:
+            callback(f"Error: {result.error}")
+        return
+
+    if result.unsafe_mixed:
+        stats["unsafe_skipped"] += 1
+        if callback:
+            callback(
+                f"Warning: {destination_path} produced mixed QB/ESX symbols; kept original content."
             )
-            is_target_file = suffix == ".lua" or is_profile_sql
 
-            if not is_target_file:
-                try:
-                    shutil.copy2(source_path, destination_path)
-                except OSError as exc:
-                    stats["errors"] += 1
-                    if callback:
-                        callback(f"Error: Failed to copy {source_path}: {exc}")
-                continue
+    if result.changed:
+        stats["converted"] += 1
+        if callback:
+            callback(f"Converted: {destination_path}")
+    else:
+        stats["skipped"] += 1
+        if callback:
+            callback(f"Skipped: {destination_path}")
+    if result.leftovers:
+        stats["flagged"] += 1
+        if result.hits:
+            hint = f"{destination_path}: " + ", ".join(
+                [f"L{line}:{column} {marker}" for line, column, marker in result.hits]
+            )
+        else:
+            hint = f"{destination_path}: " + ", ".join(result.leftovers)
+        if len(stats["review_hints"]) < REVIEW_HINT_LIMIT:
+            stats["review_hints"].append(hint)
+        if callback:
+            callback(f"Warning: {hint}")
 
-            stats["total"] += 1
 
-            try:
-                changed, leftovers, unsafe_mixed = process_file(
-                    str(source_path),
-                    str(destination_path),
-                    patterns,
-                    direction,
-                    profile,
-                    str(relative_path).replace("\\", "/"),
-                )
-                if unsafe_mixed:
-                    stats["unsafe_skipped"] += 1
-                    if callback:
-                        callback(
-                            f"Warning: {destination_path} produced mixed QB/ESX symbols; kept original content."
-                        )
+def _remove_stale_outputs(
+    destination_root: Path,
+    relative_paths,
+    stats: dict[str, object],
+    callback,
+) -> None:
+    for relative_path in sorted(relative_paths):
+        destination_path = destination_root / relative_path
+        try:
+            destination_path.unlink()
+        except FileNotFoundError:
+            continue
+        except OSError as exc:
+            stats["errors"] += 1
+            if callback:
+                callback(f"Error: Failed to remove {destination_path}: {exc}")
+            continue
+        stats["removed"] += 1
+        if callback:
+            callback(f"Removed: {destination_path}")
+        try:
+            os.removedirs(destination_path.parent)
+        except OSError:
+            pass
 
-                if changed:
-                    stats["converted"] += 1
-                    if callback:
-                        callback(f"Converted: {destination_path}")
-                else:
-                    stats["skipped"] += 1
-                    if callback:
-                        callback(f"Skipped: {destination_path}")
-                if leftovers:
-                    if unsafe_mixed:
-                        hits = []
-                    else:
-                        try:
-                            hits = find_marker_hits(
-                                destination_path.read_text(encoding="utf-8"),
-                                direction,
-                                profile,
-                            )
-                        except OSError:
-                            hits = []
-                    stats["flagged"] += 1
-                    if hits:
-                        hint = f"{destination_path}: " + ", ".join(
-                            [f"L{line} {marker}" for line, marker in hits]
-                        )
-                    else:
-                        hint = f"{destination_path}: " + ", ".join(leftovers)
-                    stats["review_hints"].append(hint)
-                    if callback:
-                        callback(f"Warning: {hint}")
-            except RuntimeError as exc:
-                stats["errors"] += 1
-                if callback:
-                    callback(f"Error: {exc}")
 
+def process_folder(
+    source_folder: str,
+    destination_folder: str,
+    patterns: list[tuple[str, str]],
+    direction: str,
+    profile: str = PROFILE_GENERIC,
+    callback=None,
+    parallel: bool = False,
+    incremental: bool = False,
+    cancel_event=None,
+    link_mode: str = LINK_COPY,
+    timings: bool = False,
+    exclude=DEFAULT_EXCLUDES,
+    include=(),
+    passthrough=(),
+    dry_run: bool = False,
+    diff_callback=None,
+    diff_lines: int = DIFF_MAX_LINES,
+    report=None,
+    slowest: int = 0,
+    profiler=None,
+    usage: bool = False,
+) -> dict[str, object]:
+    # dry_run converts in memory and writes nothing: no output tree, manifest, assets or
+    # profile extras, only the stats and review hints. diff_callback(relative_path, diff)
+    # then receives a unified diff, capped at diff_lines lines, for each file that would
+    # change; diffs are only built when it is given. report (a JsonlReport) receives one
+    # record per target file as the run goes. slowest=N lists the N slowest files in
+    # stats["slowest"]. profiler is a hook from src.core.profiling (or any callable of
+    # the same shape) that wraps the whole run and writes its file next to the output.
+    # usage counts the hits of every pattern and profile rule, with their time, in
+    # stats["usage"]; files replayed from the manifest or deduped are not counted.
+    run = partial(
+        _process_folder,
+        source_folder=source_folder,
+        destination_folder=destination_folder,
+        patterns=patterns,
+        direction=direction,
+        profile=profile,
+        callback=callback,
+        parallel=parallel,
+        incremental=incremental,
+        cancel_event=cancel_event,
+        link_mode=link_mode,
+        timings=timings,
+        exclude=exclude,
+        include=include,
+        passthrough=passthrough,
+        dry_run=dry_run,
+        diff_callback=diff_callback,
+        diff_lines=diff_lines,
+        report=report,
+        slowest=slowest,
+        usage=usage,
+    )
+    if profiler is None:
+        return run()
+    stats = None
     try:
-        created = write_profile_extras(destination_root, direction, profile)
-        if callback:
-            for path in created:
-                callback(f"Converted: {path}")
+        stem = os.path.normpath(os.fspath(destination_folder))
+        with profiler(stem) as profile_output:
+            stats = run()
     except OSError as exc:
+        if stats is None:
+            raise
         stats["errors"] += 1
         if callback:
-            callback(f"Error: Failed to write profile extras: {exc}")
+            callback(f"Error: Failed to write profile: {exc}")
+        return stats
+    stats["profile_output"] = profile_output
+    return stats
+
+
+def _process_folder(
+    *,
+    source_folder: str,
+    destination_folder: str,
+    patterns: list[tuple[str, str]],
+    direction: str,
+    profile: str,
+    callback,
+    parallel: bool,
+    incremental: bool,
+    cancel_event,
+    link_mode: str,
+    timings: bool,
+    exclude,
+    include,
+    passthrough,
+    dry_run: bool,
+    diff_callback,
+    diff_lines: int,
+    report,
+    slowest: int,
+    usage: bool,
+) -> dict[str, object]:
+    from src.core.archive import archive_suffix, is_archive
+
+    if is_archive(source_folder) or archive_suffix(destination_folder):
+        from src.core.archive import process_archive
+
+        # Archives are streamed entry by entry; parallel, incremental and link modes only
+        # apply to folder-to-folder runs.
+        return process_archive(
+            source_folder,
+            destination_folder,
+            patterns,
+            direction,
+            profile,
+            callback,
+            cancel_event,
+            timings,
+            exclude,
+            include,
+            passthrough,
+            dry_run,
+            diff_callback,
+            diff_lines,
+            report,
+            usage,
+        )
+
+    stats = _new_stats()
+    destination_root = Path(destination_folder)
+    diff_lines = diff_lines if diff_callback is not None else 0
+    if dry_run:
+        stats["dry_run"] = True
+        incremental = False
+    else:
+        destination_root.mkdir(parents=True, exist_ok=True)
+
+    timer = StageTimer() if timings else NULL_TIMER
+    with timer.stage("walk"):
+        entries, passthrough_folders = _collect_entries(
+            source_folder,
+            destination_folder,
+            direction,
+            profile,
+            exclude,
+            include,
+            passthrough,
+            create=not dry_run,
+        )
+
+    fingerprint = None
+    previous: dict[str, dict] = {}
+    reusable: dict[str, dict] = {}
+    manifest_files: dict[str, dict] = {}
+    if incremental:
+        fingerprint = build_fingerprint(patterns, direction, profile)
+        previous_fingerprint, previous = load_manifest(destination_root)
+        if previous_fingerprint == fingerprint:
+            for source_path, destination_path, relative_path, _ in entries:
+                record = previous.get(relative_path)
+                if is_unchanged(record, source_path, destination_path):
+                    reusable[relative_path] = record
+
+    jobs = [
+        (source_path, destination_path, relative_path)
+        for source_path, destination_path, relative_path, is_target_file in entries
+        if is_target_file and relative_path not in reusable
+    ]
+
+    # The slowest-file report needs each file's stage records even without timings.
+    file_timings = timings or slowest > 0
+    slowest_files = SlowestFiles(slowest)
+    usage_totals = UsageTotals(patterns)
+    workers = min(os.cpu_count() or 1, len(jobs)) if parallel else 1
+    executor = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Workers receive the pattern table once through the initializer; each job only
+        # carries paths. map() yields in submission order, so output matches a serial run.
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(
+                patterns,
+                direction,
+                profile,
+                link_mode,
+                file_timings,
+                dry_run,
+                diff_lines,
+                usage,
+            ),
+        )
+        chunksize = max(1, len(jobs) // (workers * 8))
+        results = executor.map(_convert_in_worker, jobs, chunksize=chunksize)
+    else:
+        results = _pipelined_results(
+            jobs,
+            patterns,
+            direction,
+            profile,
+            link_mode,
+            file_timings,
+            dry_run,
+            diff_lines,
+            usage,
+        )
 
+    try:
+        for source_path, destination_path, relative_path, is_target_file in entries:
+            if cancel_event is not None and cancel_event.is_set():
+                stats["cancelled"] = True
+                break
+
+            record = reusable.get(relative_path)
+            if record is not None:
+                # Unchanged since the last incremental run: replay the recorded result.
+                manifest_files[relative_path] = record
+                stats["unchanged"] += 1
+                if is_target_file:
+                    stats["total"] += 1
+                    changed, leftovers, unsafe_mixed, hits = record["result"]
+                    hits = [tuple(hit) for hit in hits]
+                    result = TargetResult(changed, leftovers, unsafe_mixed, hits)
+                    _record_target(stats, destination_path, result, None)
+                    if report is not None:
+                        report.write(
+                            target_record(relative_path, destination_path, result, True)
+                        )
+                continue
+
+            if not is_target_file:
+                if dry_run:
+                    continue
+                placed = _place_asset(
+                    stats, source_path, destination_path, link_mode, callback, timer
+                )
+                if not placed:
+                    continue
+                if incremental:
+                    record = build_record(source_path)
+                    if record is not None:
+                        manifest_files[relative_path] = record
+                continue
+
+            stats["total"] += 1
+            result = next(results)
+            if result.records:
+                slowest_files.add(relative_path, result.records)
+                if timings:
+                    timer.records.extend(result.records)
+            if result.deduped:
+                stats["deduped"] += 1
+            elif result.usage is not None:
+                usage_totals.add(result.usage)
+            _record_target(stats, destination_path, result, callback)
+            if report is not None:
+                report.write(target_record(relative_path, destination_path, result))
+            if result.diff is not None:
+                diff_callback(relative_path, result.diff)
+            if incremental and result.error is None:
+                record = build_record(
+                    source_path,
+                    [result.changed, result.leftovers, result.unsafe_mixed, result.hits],
+                )
+                if record is not None:
+                    manifest_files[relative_path] = record
+    finally:
+        results.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    if incremental:
+        if stats["cancelled"]:
+            # Keep tracking outputs this run never reached so later runs can still remove
+            # them, but never trust their recorded results.
+            for relative_path in set(previous) - set(manifest_files):
+                manifest_files[relative_path] = {"size": None, "hash": None, "result": None}
+        else:
+            current = {relative_path for _, _, relative_path, _ in entries}
+            _remove_stale_outputs(destination_root, set(previous) - current, stats, callback)
+        try:
+            save_manifest(destination_root, fingerprint, manifest_files)
+        except OSError as exc:
+            stats["errors"] += 1
+            if callback:
+                callback(f"Error: Failed to write manifest: {exc}")
+
+    if not stats["cancelled"] and not dry_run:
+        with timer.stage("passthrough"):
+            for relative in passthrough_folders:
+                _place_passthrough(
+                    stats, source_folder, destination_folder, relative, link_mode, callback
+                )
+        try:
+            with timer.stage("write_profile_extras"):
+                created = write_profile_extras(destination_root, direction, profile)
+            if callback:
+                for path in created:
+                    callback(f"Converted: {path}")
+        except OSError as exc:
+            stats["errors"] += 1
+            if callback:
+                callback(f"Error: Failed to write profile extras: {exc}")
+
+    stats["dedupe_ratio"] = round(stats["deduped"] / len(jobs), 3) if jobs else 0.0
+    if timings:
+        stats["timings"] = timer.summary()
+    if slowest:
+        stats["slowest"] = slowest_files.summary()
+    if usage:
+        stats["usage"] = usage_totals.summary()
     return stats
+
+
+def sync_paths(
+    source_folder: str,
+    destination_folder: str,
+    relative_paths,
+    patterns: list[tuple[str, str]],
+    direction: str,
+    profile: str = PROFILE_GENERIC,
+    callback=None,
+    link_mode: str = LINK_COPY,
+    exclude=DEFAULT_EXCLUDES,
+    include=(),
+    passthrough=(),
+    report=None,
+) -> dict[str, object]:
+    # Brings the given source paths in line with the output: files are converted or
+    # placed, folders are walked, and paths that no longer exist are removed.
+    stats = _new_stats()
+    destination_root = Path(destination_folder)
+    placed_passthrough: set[str] = set()
+
+    for relative_path in sorted(set(relative_paths)):
+        if matches_any(relative_path, exclude):
+            continue
+        passthrough_root = matching_prefix(relative_path, passthrough)
+        if passthrough_root:
+            # A change inside a passthrough folder re-places the folder as a whole.
+            if passthrough_root in placed_passthrough:
+                continue
+            placed_passthrough.add(passthrough_root)
+            if os.path.isdir(os.path.join(source_folder, passthrough_root)):
+                _place_passthrough(
+                    stats, source_folder, destination_folder, passthrough_root, link_mode, callback
+                )
+                continue
+            relative_path = passthrough_root
+
+        source_path = os.path.join(source_folder, relative_path)
+        if os.path.isdir(source_path) and os.path.islink(source_path):
+            # Symlinked folders are not followed, as in a full walk.
+            continue
+        if os.path.isdir(source_path):
+            entries, nested_passthrough = _collect_entries(
+                source_folder,
+                destination_folder,
+                direction,
+                profile,
+                exclude,
+                include,
+                passthrough,
+                start=relative_path,
+            )
+            for relative in nested_passthrough:
+                placed_passthrough.add(relative)
+                _place_passthrough(
+                    stats, source_folder, destination_folder, relative, link_mode, callback
+                )
+        elif os.path.isfile(source_path):
+            if include and not matches_file(relative_path, include):
+                continue
+            entries = [
+                _build_entry(source_folder, destination_folder, relative_path, direction, profile)
+            ]
+        else:
+            destination_path = destination_root / relative_path
+            if destination_path.is_dir() and not destination_path.is_symlink():
+                shutil.rmtree(destination_path, ignore_errors=True)
+                stats["removed"] += 1
+                if callback:
+                    callback(f"Removed: {destination_path}")
+            else:
+                _remove_stale_outputs(destination_root, [relative_path], stats, callback)
+            continue
+
+        for entry_source, destination_path, entry_relative, is_target_file in entries:
+            if not is_target_file:
+                _place_asset(stats, entry_source, destination_path, link_mode, callback)
+                continue
+            stats["total"] += 1
+            result = convert_target(
+                entry_source,
+                destination_path,
+                patterns,
+                direction,
+                profile,
+                entry_relative,
+                link_mode,
+            )
+            _record_target(stats, destination_path, result, callback)
+            if report is not None:
+                report.write(target_record(entry_relative, destination_path, result))
+    return stats
+
+
+def build_output_folder(
+    source_folder: str,
+    direction: str,
+    profile: str,
+    reuse_existing: bool = False,
+) -> str:
+    from src.core.archive import archive_suffix, is_archive
+
+    source = Path(source_folder).resolve()
+    suffix = "esx_to_qb" if direction == "ESX to QB-Core" else "qb_to_esx"
+    if profile == PROFILE_QB_BANKING_ESX_COMPAT and direction == "QB-Core to ESX":
+        suffix = f"{suffix}_banking_compat"
+    # An archive source gets an archive of the same format next to it.
+    extension = archive_suffix(source) if is_archive(source) else ""
+    stem = source.name[: len(source.name) - len(extension)]
+    base = source.parent / f"{stem}_{suffix}_converted"
+    if reuse_existing:
+        return f"{base}{extension}"
+    candidate = base
+    index = 1
+    while Path(f"{candidate}{extension}").exists():
+        candidate = source.parent / f"{base.name}_{index}"
+        index += 1
+    return f"{candidate}{extension}"
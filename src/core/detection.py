@@ -0,0 +1,99 @@
+import os
+import re
+
+from src.core.analysis import ESX_MARKERS, QB_MARKERS
+from src.core.matcher import compile_literals
+
+RESOURCE_MANIFESTS = ("fxmanifest.lua", "__resource.lua")
+DETECTION_MIN_HITS = 8
+DETECTION_CONFIDENCE = 0.8
+DETECTION_SAMPLE_CHARS = 64 * 1024
+
+_MARKER_SIDES = {marker.lower(): "qb" for marker in QB_MARKERS}
+_MARKER_SIDES.update({marker.lower(): "esx" for marker in ESX_MARKERS})
+# The matcher tries every position but only reports the longest marker starting there,
+# so a hit also credits the shorter markers it contains ("esx:" implies "esx").
+_CONTAINED = {
+    marker: [other for other in _MARKER_SIDES if other != marker and other in marker]
+    for marker in _MARKER_SIDES
+}
+
+
+def _marker_regex():
+    return compile_literals(tuple(_MARKER_SIDES), re.IGNORECASE, overlapping=True)
+
+
+def _sample_hits(path: str) -> tuple[int, int]:
+    try:
+        with open(path, encoding="utf-8", errors="ignore") as handle:
+            sample = handle.read(DETECTION_SAMPLE_CHARS)
+    except OSError:
+        return 0, 0
+
+    found: set[str] = set()
+    for match in _marker_regex().finditer(sample):
+        marker = match.group(1).lower()
+        if marker not in found:
+            found.add(marker)
+            found.update(_CONTAINED[marker])
+        if len(found) == len(_MARKER_SIDES):
+            break
+    qb_hits = sum(1 for marker in found if _MARKER_SIDES[marker] == "qb")
+    return qb_hits, len(found) - qb_hits
+
+
+def _verdict(qb_hits: int, esx_hits: int) -> tuple[str, float]:
+    total = qb_hits + esx_hits
+    if qb_hits > esx_hits:
+        return "QB-Core", qb_hits / total
+    if esx_hits > qb_hits:
+        return "ESX", esx_hits / total
+    return "Unknown", 0.0
+
+
+def _is_decided(qb_hits: int, esx_hits: int) -> bool:
+    total = qb_hits + esx_hits
+    return total >= DETECTION_MIN_HITS and max(qb_hits, esx_hits) / total >= DETECTION_CONFIDENCE
+
+
+def detect_resource_frameworks(folder: str) -> dict[str, tuple[str, float]]:
+    # Every fxmanifest.lua/__resource.lua directory is scored on its own; files outside
+    # any resource are grouped under ".". Scoring stops as soon as a resource is decided.
+    counts: dict[str, list[int]] = {}
+    resource_of: dict[str, str] = {}
+
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        relative_root = os.path.relpath(root, folder).replace("\\", "/")
+        if any(name in files for name in RESOURCE_MANIFESTS):
+            resource = relative_root
+        else:
+            parent = os.path.dirname(root)
+            resource = resource_of.get(parent, ".") if root != folder else "."
+        resource_of[root] = resource
+
+        lua_files = sorted(name for name in files if name.lower().endswith(".lua"))
+        if not lua_files:
+            continue
+        hits = counts.setdefault(resource, [0, 0])
+        for name in lua_files:
+            if _is_decided(*hits):
+                break
+            qb_hits, esx_hits = _sample_hits(os.path.join(root, name))
+            hits[0] += qb_hits
+            hits[1] += esx_hits
+
+    return {resource: _verdict(*hits) for resource, hits in sorted(counts.items())}
+
+
+def summarize_frameworks(resources: dict[str, tuple[str, float]]) -> str:
+    verdicts = {verdict for verdict, _ in resources.values() if verdict != "Unknown"}
+    if len(verdicts) > 1:
+        return "Mixed"
+    if verdicts:
+        return verdicts.pop()
+    return "Unknown"
+
+
+def detect_source_framework(folder: str) -> str:
+    return summarize_frameworks(detect_resource_frameworks(folder))
@@ -0,0 +1,25 @@
+from difflib import unified_diff
+from itertools import islice
+
+DIFF_MAX_LINES = 200
+
+
+def diff_body(content: str, final_content: str, max_lines: int = DIFF_MAX_LINES) -> str:
+    # Hunks only, without the ---/+++ header, so one body can be reused for every
+    # identical copy. unified_diff is a generator; islice stops it after max_lines.
+    lines = unified_diff(
+        content.splitlines(keepends=True), final_content.splitlines(keepends=True)
+    )
+    body = list(islice(lines, 2, max_lines + 3))
+    truncated = len(body) > max_lines
+    body = [
+        line if line.endswith("\n") else f"{line}\n\\ No newline at end of file\n"
+        for line in body[:max_lines]
+    ]
+    if truncated:
+        body.append(f"# diff truncated after {max_lines} lines\n")
+    return "".join(body)
+
+
+def with_header(relative_path: str, body: str) -> str:
+    return f"--- a/{relative_path}\n+++ b/{relative_path}\n{body}"
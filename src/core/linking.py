@@ -0,0 +1,95 @@
+import os
+import shutil
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LINK_COPY = "copy"
+LINK_HARDLINK = "hardlink"
+LINK_REFLINK = "reflink"
+LINK_SYMLINK = "symlink"
+
+LINK_MODES = [
+    LINK_COPY,
+    LINK_HARDLINK,
+    LINK_REFLINK,
+    LINK_SYMLINK,
+]
+
+_FICLONE = 0x40049409
+
+
+def _reflink(source: str, destination: str) -> None:
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        try:
+            if fcntl is None:
+                raise OSError("FICLONE is not available")
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        except OSError:
+            # copy_file_range still shares extents on filesystems that support it and
+            # otherwise copies in the kernel without a round trip through user space.
+            if not hasattr(os, "copy_file_range"):
+                raise
+            remaining = os.fstat(src.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+    shutil.copystat(source, destination)
+
+
+def remove_existing(destination: str) -> None:
+    # Outputs from an earlier link-mode run may be hard links or symlinks to the source;
+    # replacing them in place would write through to the source tree.
+    try:
+        os.unlink(destination)
+    except FileNotFoundError:
+        pass
+
+
+def place_file(source, destination, mode: str = LINK_COPY) -> str:
+    source = os.fspath(source)
+    destination = os.fspath(destination)
+    remove_existing(destination)
+    if mode != LINK_COPY:
+        try:
+            if mode == LINK_HARDLINK:
+                os.link(source, destination)
+            elif mode == LINK_SYMLINK:
+                os.symlink(os.path.abspath(source), destination)
+            elif mode == LINK_REFLINK:
+                _reflink(source, destination)
+            else:
+                raise ValueError(f"Unknown link mode: {mode}")
+            return mode
+        except OSError:
+            remove_existing(destination)
+    shutil.copy2(source, destination)
+    return LINK_COPY
+
+
+def place_folder(source, destination, mode: str = LINK_COPY) -> None:
+    # Passthrough folders are mirrored whole: one symlink in symlink mode, otherwise each
+    # file is placed with the same mode as single assets.
+    source = os.fspath(source)
+    destination = os.fspath(destination)
+    if os.path.islink(destination):
+        os.unlink(destination)
+    if mode == LINK_SYMLINK:
+        if os.path.isdir(destination):
+            shutil.rmtree(destination)
+        try:
+            os.symlink(os.path.abspath(source), destination, target_is_directory=True)
+            return
+        except OSError:
+            pass
+    shutil.copytree(
+        source,
+        destination,
+        symlinks=True,
+        copy_function=lambda src, dst: place_file(src, dst, mode),
+        dirs_exist_ok=True,
+    )
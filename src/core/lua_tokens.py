@@ -0,0 +1,42 @@
+import re
+
+# Only comments and string literals matter to the analyses, so the tokenizer skips
+# everything else. Strings are matched at their own start so "--" inside a string is
+# not mistaken for a comment.
+_TOKEN_RE = re.compile(
+    r"--\[(=*)\[.*?\]\1\]"
+    r"|--[^\n]*"
+    r"|\[(=*)\[.*?\]\2\]"
+    r"|\"(?:\\.|[^\"\\\n])*\""
+    r"|'(?:\\.|[^'\\\n])*'",
+    re.DOTALL,
+)
+
+_BYTE_TOKEN_RE = re.compile(_TOKEN_RE.pattern.encode("ascii"), re.DOTALL)
+
+TOKEN_COMMENT = "comment"
+TOKEN_STRING = "string"
+
+
+def iter_tokens(text):
+    # text is a str, or bytes-like (bytes, mmap) for the large-file path.
+    regex, opener = (_TOKEN_RE, "--") if isinstance(text, str) else (_BYTE_TOKEN_RE, b"--")
+    for match in regex.finditer(text):
+        start = match.start()
+        kind = TOKEN_COMMENT if text[start : start + 2] == opener else TOKEN_STRING
+        yield kind, start, match.end()
+
+
+def blank_spans(text: str, spans: list[tuple[int, int]]) -> str:
+    # Blanked text keeps every offset and newline, so positions and line numbers found
+    # in it map straight back to the original.
+    if not spans:
+        return text
+    pieces = []
+    last = 0
+    for start, end in spans:
+        pieces.append(text[last:start])
+        pieces.append("\n".join(" " * len(part) for part in text[start:end].split("\n")))
+        last = end
+    pieces.append(text[last:])
+    return "".join(pieces)
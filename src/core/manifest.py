@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from src import __version__
+
+MANIFEST_NAME = ".converter-manifest.json"
+MANIFEST_VERSION = 2
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_fingerprint(patterns: list[tuple[str, str]], direction: str, profile: str) -> str:
+    # Any change to the converter version, pattern table or profile invalidates every entry.
+    payload = json.dumps([__version__, direction, profile, patterns], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_manifest(destination_root: Path) -> tuple[str | None, dict[str, dict]]:
+    try:
+        data = json.loads((destination_root / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None, {}
+    files = data.get("files")
+    if data.get("version") != MANIFEST_VERSION or not isinstance(files, dict):
+        return None, {}
+    return data.get("fingerprint"), files
+
+
+def save_manifest(destination_root: Path, fingerprint: str, files: dict[str, dict]) -> None:
+    path = destination_root / MANIFEST_NAME
+    temp_path = path.with_name(f"{MANIFEST_NAME}.tmp")
+    payload = {"version": MANIFEST_VERSION, "fingerprint": fingerprint, "files": files}
+    temp_path.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+    os.replace(temp_path, path)
+
+
+def is_unchanged(record: dict | None, source_path: Path, destination_path: Path) -> bool:
+    if not record or not os.path.exists(destination_path):
+        return False
+    try:
+        stat = os.stat(source_path)
+    except OSError:
+        return False
+    if record.get("size") != stat.st_size:
+        return False
+    if record.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    try:
+        unchanged = record.get("hash") == hash_file(source_path)
+    except OSError:
+        return False
+    if unchanged:
+        record["mtime_ns"] = stat.st_mtime_ns
+    return unchanged
+
+
+def build_record(source_path: Path, result=None) -> dict | None:
+    try:
+        stat = os.stat(source_path)
+        digest = hash_file(source_path)
+    except OSError:
+        return None
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": digest,
+        "result": result,
+    }
@@ -0,0 +1,43 @@
+import codecs
+import mmap
+import os
+import re
+
+# Files at least this large are memory-mapped and converted as bytes when the pattern
+# table allows it; smaller ones are cheaper to read whole.
+LARGE_FILE_BYTES = 4 << 20
+
+VALIDATE_CHUNK = 1 << 20
+
+_NEWLINE_RE = re.compile(rb"\r\n?")
+
+
+def map_source(path: str):
+    # Returns the file as a read-only mmap, or as bytes when it has "\r" line endings.
+    # Either way the content equals read_text(encoding="utf-8").encode("utf-8"): invalid
+    # UTF-8 raises UnicodeDecodeError and line endings are translated the same way.
+    with open(path, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return b""
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for start in range(0, len(mapped), VALIDATE_CHUNK):
+            decoder.decode(mapped[start : start + VALIDATE_CHUNK])
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        mapped.close()
+        raise
+    if mapped.find(b"\r") == -1:
+        return mapped
+    translated = _NEWLINE_RE.sub(b"\n", mapped)
+    mapped.close()
+    return translated
+
+
+def write_bytes(path: str, data) -> None:
+    # Same line endings as Path.write_text on this platform.
+    if os.linesep != "\n":
+        data = re.sub(b"\n", os.linesep.encode("ascii"), data)
+    with open(path, "wb") as handle:
+        handle.write(data)
@@ -0,0 +1,126 @@
+import re
+from functools import lru_cache
+
+
+def _trie_regex(node: dict) -> str:
+    terminal = "" in node
+    branches = [
+        re.escape(char) + _trie_regex(child) for char, child in sorted(node.items()) if char
+    ]
+    if not branches:
+        return ""
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+    body = "(?:" + "|".join(branches) + ")"
+    # A greedy optional group tries the longer keys first and only falls back to the
+    # shorter key ending here, which gives leftmost-longest matches.
+    return f"{body}?" if terminal else body
+
+
+def literal_regex(keys) -> str:
+    trie: dict = {}
+    for key in keys:
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _trie_regex(trie)
+
+
+def _overlapping(regex: str) -> str:
+    # A lookahead consumes nothing, so every start position is tried and a key starting
+    # inside an earlier hit is still found; group 1 holds the longest key at each start.
+    return f"(?=({regex}))"
+
+
+@lru_cache(maxsize=None)
+def compile_literals(
+    keys: tuple[str, ...], flags: int = 0, overlapping: bool = False
+) -> "re.Pattern[str] | None":
+    keys = tuple(key for key in keys if key)
+    if not keys:
+        return None
+    regex = literal_regex(keys)
+    return re.compile(_overlapping(regex) if overlapping else regex, flags)
+
+
+@lru_cache(maxsize=None)
+def _compile_table(patterns: tuple[tuple[str, str], ...]):
+    table: dict[str, str] = {}
+    for old, new in patterns:
+        # Sequential replacement made the first entry win, later duplicates were no-ops.
+        table.setdefault(old, new)
+    return compile_literals(tuple(table)), table
+
+
+def compile_patterns(patterns) -> tuple["re.Pattern[str] | None", dict[str, str]]:
+    return _compile_table(tuple(patterns))
+
+
+def replace_all(content: str, patterns, counts=None) -> str:
+    # counts, when given, is a Counter that collects the hits per pattern key.
+    regex, table = compile_patterns(patterns)
+    if regex is None:
+        return content
+    if counts is None:
+        return regex.sub(lambda match: table[match.group(0)], content)
+
+    def replace(match) -> str:
+        key = match.group(0)
+        counts[key] += 1
+        return table[key]
+
+    return regex.sub(replace, content)
+
+
+@lru_cache(maxsize=None)
+def compile_byte_literals(
+    keys: tuple[str, ...], flags: int = 0, overlapping: bool = False
+) -> "re.Pattern[bytes] | None":
+    # ASCII keys only: an ASCII byte never occurs inside a multi-byte UTF-8 sequence, so
+    # matches in the encoded text are exactly the matches in the decoded text.
+    keys = tuple(key for key in keys if key)
+    if not keys or not all(key.isascii() for key in keys):
+        return None
+    regex = literal_regex(keys)
+    return re.compile((_overlapping(regex) if overlapping else regex).encode("ascii"), flags)
+
+
+@lru_cache(maxsize=None)
+def _compile_byte_table(patterns: tuple[tuple[str, str], ...]):
+    regex, table = _compile_table(patterns)
+    byte_regex = compile_byte_literals(tuple(table))
+    if regex is None or byte_regex is None:
+        return None
+    return byte_regex, {old.encode("ascii"): new.encode("utf-8") for old, new in table.items()}
+
+
+def compile_byte_patterns(patterns) -> "tuple[re.Pattern[bytes], dict[bytes, bytes]] | None":
+    # None when the table is empty or has a non-ASCII key; callers then decode and use
+    # the str matcher.
+    return _compile_byte_table(tuple(patterns))
+
+
+def replace_all_bytes(content, patterns, counts=None) -> tuple[bytearray, int]:
+    # content is bytes-like (bytes or mmap). The output grows in one bytearray from
+    # zero-copy slices of the input, where re.sub would hold every piece and the joined
+    # result at once. Returns the output and the number of replacements; counts works as
+    # in replace_all, keyed by the decoded pattern.
+    regex, table = compile_byte_patterns(patterns)
+    view = memoryview(content)
+    output = bytearray()
+    last = count = 0
+    try:
+        for match in regex.finditer(content):
+            start = match.start()
+            output += view[last:start]
+            key = match.group(0)
+            output += table[key]
+            last = match.end()
+            count += 1
+            if counts is not None:
+                counts[key.decode("ascii")] += 1
+        output += view[last:]
+    finally:
+        view.release()
+    return output, count
@@ -1,5 +1,10 @@
 import re
 from pathlib import Path
+from time import perf_counter
+
+from src.core.analysis import PROFILE_GATE_MARKERS, as_analysis
+from src.core.matcher import replace_all
+from src.core.usage import NULL_USAGE
 
 PROFILE_GENERIC = "Generic"
 PROFILE_QB_BANKING_ESX_COMPAT = "QB-Core -> ESX (Compat Bridge)"
@@ -497,36 +502,80 @@ end
 """
 
 
-def _remove_framework_bootstrap(content: str) -> str:
-    content = re.sub(
-        r"^\s*local\s+QBCore\s*=\s*exports\[['\"]qb-core['\"]\]:GetCoreObject\(\)\s*\n?",
-        "",
-        content,
-        flags=re.MULTILINE,
-    )
-    content = re.sub(
-        r"^\s*QBCore\s*=\s*exports\[['\"]qb-core['\"]\]:GetCoreObject\(\)\s*\n?",
-        "",
-        content,
-        flags=re.MULTILINE,
-    )
-    content = re.sub(
-        r"^\s*local\s+ESX\s*=\s*exports\[['\"]es_extended['\"]\]:getSharedObject\(\)\s*\n?",
-        "",
-        content,
-        flags=re.MULTILINE,
-    )
-    return content.lstrip()
+# The three bootstrap forms in one pass. Consecutive bootstrap lines are taken by a
+# single match, as the old one-regex-per-form passes would have removed them all.
+_BOOTSTRAP_RE = re.compile(
+    r"^\s*(?:(?:local\s+QBCore\s*=\s*exports\[['\"]qb-core['\"]\]:GetCoreObject\(\)"
+    r"|QBCore\s*=\s*exports\[['\"]qb-core['\"]\]:GetCoreObject\(\)"
+    r"|local\s+ESX\s*=\s*exports\[['\"]es_extended['\"]\]:getSharedObject\(\))\s*\n?)+",
+    re.MULTILINE,
+)
+
+_SQL_CITIZENID_WIDTH_RE = re.compile(r"(`citizenid`\s+(?:varchar|char)\()\d+(\))", re.IGNORECASE)
+
+
+def _regex_rule(name: str, anchors: tuple[str, ...], regex: "re.Pattern[str]", replacement: str):
+    return name, anchors, lambda content: regex.sub(replacement, content)
+
+
+def _literal_rule(name: str, anchors: tuple[str, ...], pairs: list[tuple[str, str]]):
+    return name, anchors, lambda content: replace_all(content, pairs)
+
+
+# Rules are (name, anchors, rewrite). A rule only runs when one of its anchors occurs in
+# the file, so a file without the relevant calls costs one substring search per rule.
+BOOTSTRAP_RULE = _regex_rule("bootstrap", ("GetCoreObject", "getSharedObject"), _BOOTSTRAP_RE, "")
+
+CLIENT_REWRITE_RULES = [
+    BOOTSTRAP_RULE,
+    _literal_rule(
+        "client_exports",
+        ("exports[",),
+        [
+            ("exports['qb-core']:DrawText(", "ShowPromptCompat("),
+            ('exports["qb-core"]:DrawText(', "ShowPromptCompat("),
+            ("exports['qb-core']:HideText()", "HidePromptCompat()"),
+            ('exports["qb-core"]:HideText()', "HidePromptCompat()"),
+            ("exports['qb-target']:AddCircleZone(", "AddCircleZoneCompat("),
+            ("exports['qtarget']:AddCircleZone(", "AddCircleZoneCompat("),
+            ("exports['qb-target']:AddTargetModel(", "AddTargetModelCompat("),
+            ("exports['qtarget']:AddTargetModel(", "AddTargetModelCompat("),
+        ],
+    ),
+]
+
+SERVER_REWRITE_RULES = [
+    BOOTSTRAP_RULE,
+    _regex_rule(
+        "inventory_add_item",
+        ("qb-inventory",),
+        re.compile(r"exports\[['\"]qb-inventory['\"]\]:AddItem\("),
+        "AddItemCompat(",
+    ),
+    _regex_rule(
+        "qb_log",
+        ("qb-log:server:CreateLog",),
+        re.compile(r"TriggerEvent\('qb-log:server:CreateLog',\s*([^\n]+)\)"),
+        r"LogCompat(\1)",
+    ),
+]
+
+
+def _apply_rules(content: str, rules, usage=NULL_USAGE) -> str:
+    for name, anchors, rewrite in rules:
+        start = perf_counter()
+        ran = any(anchor in content for anchor in anchors)
+        rewritten = rewrite(content) if ran else content
+        usage.rule(name, ran, ran and rewritten != content, perf_counter() - start)
+        content = rewritten
+    return content
 
 
 def _is_manifest_file(path: str) -> bool:
     return path.endswith("fxmanifest.lua") or path.endswith("__resource.lua")
 
 
-def _role_scores(path: str, content: str) -> tuple[int, int]:
-    lower = content.lower()
-    normalized = path.replace("\\", "/").lower()
-
+def _path_role_scores(normalized: str) -> tuple[int, int]:
     client_score = 0
     server_score = 0
 
@@ -534,75 +583,41 @@ def _role_scores(path: str, content: str) -> tuple[int, int]:
         client_score += 3
     if "/server" in normalized or normalized.startswith("server"):
         server_score += 3
+    return client_score, server_score
 
-    client_hints = [
-        "registernuicallback(",
-        "setnuifocus(",
-        "sendnuimessage(",
-        "playerpedid(",
-        "getentitycoords(playerpedid())",
-        "addblipforcoord(",
-        "qbcore.functions.progressbar",
-        "exports['qb-target']",
-        'exports["qb-target"]',
-        "exports['qtarget']",
-        'exports["qtarget"]',
-        "drawtext(",
-        "hidetext()",
-        "combozone:create(",
-        "circlezone:create(",
-    ]
-
-    server_hints = [
-        "qbcore.functions.createcallback(",
-        "qbcore.functions.createuseableitem(",
-        "qbcore.commands.add(",
-        "mysql.",
-        "registercommand(",
-        "registerserverevent(",
-        "triggerclientevent(",
-        "exports['qb-inventory']",
-        'exports["qb-inventory"]',
-        "exports(",
-    ]
-
-    for hint in client_hints:
-        if hint in lower:
-            client_score += 1
-    for hint in server_hints:
-        if hint in lower:
-            server_score += 1
 
-    return client_score, server_score
+def _role_scores(path: str, content) -> tuple[int, int]:
+    analysis = as_analysis(content)
+    client_score, server_score = _path_role_scores(path.replace("\\", "/").lower())
+    client_hits, server_hits = analysis.role_hints
+    return client_score + client_hits, server_score + server_hits
 
 
-def _rewrite_client_qb_banking(content: str) -> str:
-    content = _remove_framework_bootstrap(content)
-    content = content.replace("exports['qb-core']:DrawText(", "ShowPromptCompat(")
-    content = content.replace('exports["qb-core"]:DrawText(', "ShowPromptCompat(")
-    content = content.replace("exports['qb-core']:HideText()", "HidePromptCompat()")
-    content = content.replace('exports["qb-core"]:HideText()', "HidePromptCompat()")
-    content = content.replace("exports['qb-target']:AddCircleZone(", "AddCircleZoneCompat(")
-    content = content.replace("exports['qtarget']:AddCircleZone(", "AddCircleZoneCompat(")
-    content = content.replace("exports['qb-target']:AddTargetModel(", "AddTargetModelCompat(")
-    content = content.replace("exports['qtarget']:AddTargetModel(", "AddTargetModelCompat(")
+def rewrite_role(relative_path: str, direction: str, profile: str) -> str:
+    # Everything apply_profile_rewrite takes from the path. Two files with the same content
+    # and the same role are rewritten identically.
+    if profile != PROFILE_QB_BANKING_ESX_COMPAT or direction != "QB-Core to ESX":
+        return ""
+    path = relative_path.replace("\\", "/").lower()
+    if _is_manifest_file(path):
+        return "manifest"
+    if path.endswith(".sql"):
+        return "sql"
+    if not path.endswith(".lua"):
+        return "other"
+    client_score, server_score = _path_role_scores(path)
+    return f"lua:{client_score}:{server_score}"
+
+
+def _rewrite_client_qb_banking(content: str, usage=NULL_USAGE) -> str:
+    content = _apply_rules(content, CLIENT_REWRITE_RULES, usage).lstrip()
     if CLIENT_COMPAT_MARKER not in content:
         content = f"{CLIENT_COMPAT_BLOCK}\n\n{content}"
     return content
 
 
-def _rewrite_server_qb_banking(content: str) -> str:
-    content = _remove_framework_bootstrap(content)
-    content = re.sub(
-        r"exports\[['\"]qb-inventory['\"]\]:AddItem\(",
-        "AddItemCompat(",
-        content,
-    )
-    content = re.sub(
-        r"TriggerEvent\('qb-log:server:CreateLog',\s*([^\n]+)\)",
-        r"LogCompat(\1)",
-        content,
-    )
+def _rewrite_server_qb_banking(content: str, usage=NULL_USAGE) -> str:
+    content = _apply_rules(content, SERVER_REWRITE_RULES, usage).lstrip()
     if SERVER_COMPAT_MARKER not in content:
         content = f"{SERVER_COMPAT_BLOCK}\n\n{content}"
     return content
@@ -636,21 +651,19 @@ def _rewrite_fxmanifest_qb_banking(content: str) -> str:
 
 def _rewrite_sql_identifier_width(content: str) -> str:
     # Keep schema key names compatible with existing SQL queries, but widen identifier storage.
-    content = re.sub(
-        r"(`citizenid`\s+(?:varchar|char)\()\d+(\))",
-        r"\g<1>64\2",
-        content,
-        flags=re.IGNORECASE,
-    )
-    return content
+    return _SQL_CITIZENID_WIDTH_RE.sub(r"\g<1>64\2", content)
 
 
 def apply_profile_rewrite(
-    content: str,
+    content,
     relative_path: str,
     direction: str,
     profile: str,
+    usage=NULL_USAGE,
 ) -> str:
+    # usage collects per-rule hits and time (src.core.usage).
+    analysis = as_analysis(content)
+    content = analysis.content
     if profile != PROFILE_QB_BANKING_ESX_COMPAT or direction != "QB-Core to ESX":
         return content
 
@@ -664,27 +677,30 @@ def apply_profile_rewrite(
     if not path.endswith(".lua"):
         return content
 
-    lowered = content.lower()
-    if (
-        "qbcore" not in lowered
-        and "qb-core" not in lowered
-        and "qb-target" not in lowered
-        and "qtarget" not in lowered
-    ):
+    # Gate on the raw text, comments included: a file that only mentions QBCore in a
+    # comment still gets the bridge, as it always has.
+    lowered = analysis.lowered
+    if not any(marker in lowered for marker in PROFILE_GATE_MARKERS):
         return content
 
-    client_score, server_score = _role_scores(path, content)
+    client_score, server_score = _role_scores(path, analysis)
     if server_score > client_score:
-        return _rewrite_server_qb_banking(content)
-    return _rewrite_client_qb_banking(content)
+        return _rewrite_server_qb_banking(content, usage)
+    return _rewrite_client_qb_banking(content, usage)
 
     return content
 
 
+def profile_extras(direction: str, profile: str) -> list[tuple[str, str]]:
+    if profile == PROFILE_QB_BANKING_ESX_COMPAT and direction == "QB-Core to ESX":
+        return [("locale_compat.lua", LOCALE_COMPAT)]
+    return []
+
+
 def write_profile_extras(destination_root: Path, direction: str, profile: str) -> list[Path]:
     created: list[Path] = []
-    if profile == PROFILE_QB_BANKING_ESX_COMPAT and direction == "QB-Core to ESX":
-        compat_path = destination_root / "locale_compat.lua"
-        compat_path.write_text(LOCALE_COMPAT, encoding="utf-8")
-        created.append(compat_path)
+    for relative, content in profile_extras(direction, profile):
+        path = destination_root / relative
+        path.write_text(content, encoding="utf-8")
+        created.append(path)
     return created
@@ -0,0 +1,74 @@
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+# A profiler hook is any callable taking the output stem (the output folder or archive
+# path) and returning a context manager; entering it starts profiling and yields the
+# file it will write on exit.
+
+SAMPLE_INTERVAL = 0.005
+
+
+@contextmanager
+def cprofile_hook(stem: str):
+    # Deterministic profile of the calling thread, written as <stem>.pstats for pstats,
+    # snakeviz and friends. Reader/writer threads and pool workers are not covered.
+    path = f"{stem}.pstats"
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield path
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        profiler.dump_stats(path)
+
+
+def _frame_stack(frame) -> list[str]:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+@contextmanager
+def sampling_hook(stem: str, interval: float = SAMPLE_INTERVAL):
+    # Samples every thread of this process each interval and writes <stem>.collapsed,
+    # one "thread;outer;...;inner count" line per stack, for flamegraph.pl or speedscope.
+    path = f"{stem}.collapsed"
+    counts: Counter = Counter()
+    stop = threading.Event()
+
+    def sample() -> None:
+        own = threading.get_ident()
+        while not stop.wait(interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = [names.get(ident, str(ident)), *_frame_stack(frame)]
+                counts[";".join(stack)] += 1
+
+    sampler = threading.Thread(target=sample, name="profiler-sampler", daemon=True)
+    sampler.start()
+    try:
+        yield path
+    finally:
+        stop.set()
+        sampler.join()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as handle:
+            for stack, count in sorted(counts.items()):
+                handle.write(f"{stack} {count}\n")
+
+
+PROFILERS = {
+    "cprofile": cprofile_hook,
+    "sample": sampling_hook,
+}
@@ -0,0 +1,58 @@
+import json
+
+
+class JsonlReport:
+    # One JSON object per line. The file is line buffered, so every record is on disk as
+    # soon as it is written and a crashed or cancelled run still leaves a readable report.
+    def __init__(self, path: str):
+        self.path = path
+        self.handle = open(path, "w", encoding="utf-8", buffering=1)
+
+    def write(self, record: dict[str, object]) -> None:
+        self.handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        self.handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _status(changed: bool, unsafe_mixed: bool, error) -> str:
+    if error is not None:
+        return "error"
+    if unsafe_mixed:
+        return "unsafe"
+    return "converted" if changed else "skipped"
+
+
+def target_record(
+    relative_path: str,
+    output,
+    result,
+    unchanged: bool = False,
+) -> dict[str, object]:
+    # result is a converter.TargetResult.
+    record = {
+        "type": "file",
+        "path": relative_path,
+        "output": str(output),
+        "status": _status(result.changed, result.unsafe_mixed, result.error),
+        "leftovers": result.leftovers,
+        "hits": [list(hit) for hit in result.hits],
+        "error": result.error,
+        "deduped": result.deduped,
+        "unchanged": unchanged,
+    }
+    if result.records:
+        timings: dict[str, float] = {}
+        for stage, seconds, _ in result.records:
+            timings[stage] = timings.get(stage, 0.0) + seconds
+        record["timings"] = {stage: round(seconds, 6) for stage, seconds in timings.items()}
+    if result.usage is not None and not result.deduped:
+        record["patterns"] = dict(result.usage.patterns)
+        record["rules"] = [name for name, counts in result.usage.rules.items() if counts[2]]
+    return record
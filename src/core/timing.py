@@ -0,0 +1,122 @@
+import heapq
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+IO_STAGES = {"walk", "read", "write", "copy", "write_profile_extras"}
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class StageTimer:
+    def __init__(self):
+        self.records: list[tuple[str, float, int]] = []
+
+    def add(self, stage: str, seconds: float, size: int = 0) -> None:
+        self.records.append((stage, seconds, size))
+
+    @contextmanager
+    def stage(self, stage: str, size: int = 0):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, perf_counter() - start, size)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        grouped: dict[str, list[float]] = {}
+        sizes: dict[str, int] = {}
+        for stage, seconds, size in self.records:
+            grouped.setdefault(stage, []).append(seconds)
+            sizes[stage] = sizes.get(stage, 0) + size
+
+        summary = {}
+        for stage, samples in grouped.items():
+            ordered = sorted(samples)
+            summary[stage] = {
+                "count": len(ordered),
+                "total": round(sum(ordered), 6),
+                "p50": round(_percentile(ordered, 0.50), 6),
+                "p95": round(_percentile(ordered, 0.95), 6),
+                "max": round(ordered[-1], 6),
+                "bytes": sizes[stage],
+            }
+        return summary
+
+
+class NullTimer:
+    def add(self, stage: str, seconds: float, size: int = 0) -> None:
+        pass
+
+    def stage(self, stage: str, size: int = 0):
+        return nullcontext()
+
+
+NULL_TIMER = NullTimer()
+
+
+class SlowestFiles:
+    # Keeps the `limit` slowest files of a run in a bounded heap, from each file's own
+    # stage records: total wall time, bytes read and the stage that took longest.
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.heap: list[tuple[float, str, int, str, float]] = []
+
+    def add(self, relative_path: str, records) -> None:
+        if not records or self.limit <= 0:
+            return
+        stages: dict[str, float] = {}
+        size = 0
+        for stage, seconds, stage_size in records:
+            stages[stage] = stages.get(stage, 0.0) + seconds
+            if stage == "read":
+                size += stage_size
+        stage, stage_seconds = max(stages.items(), key=lambda item: item[1])
+        entry = (sum(stages.values()), relative_path, size, stage, stage_seconds)
+        if len(self.heap) < self.limit:
+            heapq.heappush(self.heap, entry)
+        else:
+            heapq.heappushpop(self.heap, entry)
+
+    def summary(self) -> list[dict[str, object]]:
+        return [
+            {
+                "path": relative_path,
+                "seconds": round(seconds, 6),
+                "bytes": size,
+                "slowest_stage": stage,
+                "stage_seconds": round(stage_seconds, 6),
+            }
+            for seconds, relative_path, size, stage, stage_seconds in sorted(
+                self.heap, reverse=True
+            )
+        ]
+
+
+def split_io_cpu(summary: dict[str, dict[str, float]]) -> tuple[float, float]:
+    io_seconds = sum(entry["total"] for stage, entry in summary.items() if stage in IO_STAGES)
+    cpu_seconds = sum(entry["total"] for stage, entry in summary.items() if stage not in IO_STAGES)
+    return io_seconds, cpu_seconds
+
+
+def format_timings(summary: dict[str, dict[str, float]]) -> list[str]:
+    lines = []
+    for stage, entry in summary.items():
+        lines.append(
+            f"{stage}: {entry['total']:.3f}s over {entry['count']} "
+            f"(p50 {entry['p50'] * 1000:.2f} ms, p95 {entry['p95'] * 1000:.2f} ms, "
+            f"max {entry['max'] * 1000:.2f} ms, {entry['bytes'] / 1e6:.1f} MB)"
+        )
+    io_seconds, cpu_seconds = split_io_cpu(summary)
+    lines.append(f"I/O {io_seconds:.3f}s vs CPU {cpu_seconds:.3f}s")
+    return lines
+
+
+def format_slowest(entries: list[dict[str, object]]) -> list[str]:
+    return [
+        f"{entry['path']}: {entry['seconds'] * 1000:.1f} ms, {entry['bytes'] / 1e6:.2f} MB "
+        f"(mostly {entry['slowest_stage']}, {entry['stage_seconds'] * 1000:.1f} ms)"
+        for entry in entries
+    ]
@@ -0,0 +1,102 @@
+from collections import Counter
+
+from src.core.matcher import compile_patterns
+
+
+class PatternUsage:
+    # Hits and cost of the pattern table and the profile rewrite rules for one file. The
+    # table is matched in a single pass, so its time is only known for the table as a
+    # whole; each rule runs on its own and is timed separately.
+    def __init__(self):
+        self.patterns: Counter = Counter()
+        self.pattern_seconds = 0.0
+        # name -> [files checked, files where an anchor matched, files changed, seconds]
+        self.rules: dict[str, list] = {}
+
+    def add_pattern_time(self, seconds: float) -> None:
+        self.pattern_seconds += seconds
+
+    def rule(self, name: str, ran: bool, changed: bool, seconds: float) -> None:
+        entry = self.rules.setdefault(name, [0, 0, 0, 0.0])
+        entry[0] += 1
+        entry[1] += ran
+        entry[2] += changed
+        entry[3] += seconds
+
+
+class NullUsage:
+    patterns = None
+
+    def add_pattern_time(self, seconds: float) -> None:
+        pass
+
+    def rule(self, name: str, ran: bool, changed: bool, seconds: float) -> None:
+        pass
+
+
+NULL_USAGE = NullUsage()
+
+
+class UsageTotals:
+    # Run-wide sums of the per-file PatternUsage records. Every table entry is listed,
+    # including the ones that never matched, so dead patterns show up with zero hits.
+    def __init__(self, patterns):
+        self.table = compile_patterns(patterns)[1]
+        self.hits: Counter = Counter()
+        self.files: Counter = Counter()
+        self.counted = 0
+        self.pattern_seconds = 0.0
+        self.rules: dict[str, list] = {}
+
+    def add(self, usage: PatternUsage) -> None:
+        self.counted += 1
+        self.hits.update(usage.patterns)
+        self.files.update(usage.patterns.keys())
+        self.pattern_seconds += usage.pattern_seconds
+        for name, counts in usage.rules.items():
+            entry = self.rules.setdefault(name, [0, 0, 0, 0.0])
+            for index, value in enumerate(counts):
+                entry[index] += value
+
+    def summary(self) -> dict[str, object]:
+        patterns = [
+            {"pattern": old, "replacement": new, "hits": self.hits[old], "files": self.files[old]}
+            for old, new in self.table.items()
+        ]
+        patterns.sort(key=lambda entry: -entry["hits"])
+        rules = [
+            {
+                "rule": name,
+                "checked": checked,
+                "ran": ran,
+                "changed": changed,
+                "seconds": round(seconds, 6),
+            }
+            for name, (checked, ran, changed, seconds) in self.rules.items()
+        ]
+        rules.sort(key=lambda entry: -entry["seconds"])
+        return {
+            "files": self.counted,
+            "pattern_seconds": round(self.pattern_seconds, 6),
+            "unused": sum(1 for entry in patterns if not entry["hits"]),
+            "patterns": patterns,
+            "rules": rules,
+        }
+
+
+def format_usage(summary: dict[str, object], limit: int = 10) -> list[str]:
+    milliseconds = summary["pattern_seconds"] * 1000
+    lines = [
+        f"{summary['files']} file(s) counted, pattern pass {milliseconds:.1f} ms, "
+        f"{summary['unused']} of {len(summary['patterns'])} pattern(s) never matched"
+    ]
+    for entry in summary["patterns"][:limit]:
+        if not entry["hits"]:
+            break
+        lines.append(f"{entry['pattern']}: {entry['hits']} hit(s) in {entry['files']} file(s)")
+    for entry in summary["rules"]:
+        lines.append(
+            f"rule {entry['rule']}: changed {entry['changed']}/{entry['checked']} file(s)"
+            f", {entry['seconds'] * 1000:.1f} ms"
+        )
+    return lines
@@ -0,0 +1,113 @@
+import os
+from fnmatch import fnmatchcase
+
+DEFAULT_EXCLUDES = (".git",)
+
+
+def _split_globs(globs) -> tuple[list[str], list[str]]:
+    # A glob without "/" matches a single name (".git", "node_modules", "*.lua"), one
+    # with "/" matches the whole relative path ("*/html/node_modules").
+    name_globs, path_globs = [], []
+    for glob in globs or ():
+        glob = glob.strip("/")
+        (path_globs if "/" in glob else name_globs).append(glob)
+    return name_globs, path_globs
+
+
+def _hit(name: str, relative: str, split: tuple[list[str], list[str]]) -> bool:
+    name_globs, path_globs = split
+    return any(fnmatchcase(name, glob) for glob in name_globs) or any(
+        fnmatchcase(relative, glob) for glob in path_globs
+    )
+
+
+def matching_prefix(relative_path: str, globs) -> str:
+    # The shortest leading part of relative_path that one of the globs matches, or "".
+    split = _split_globs(globs)
+    parts = relative_path.split("/")
+    for index, part in enumerate(parts):
+        prefix = "/".join(parts[: index + 1])
+        if _hit(part, prefix, split):
+            return prefix
+    return ""
+
+
+def matches_any(relative_path: str, globs) -> bool:
+    return bool(matching_prefix(relative_path, globs))
+
+
+def matches_file(relative_path: str, globs) -> bool:
+    # Include globs only look at the file itself, as scan_tree does.
+    return _hit(relative_path.rpartition("/")[2], relative_path, _split_globs(globs))
+
+
+def scan_tree(
+    source_root: str,
+    exclude=DEFAULT_EXCLUDES,
+    include=(),
+    passthrough=(),
+    start: str = "",
+) -> tuple[list[tuple[str, str]], list[str], list[str]]:
+    # One os.scandir per folder; the DirEntry type cache tells files from folders without
+    # another stat. Excluded and passthrough folders are never entered, so globs only
+    # need checking against each entry. Like os.walk, symlinked folders are not followed
+    # (a link back up the tree would recurse) while symlinked files are converted and
+    # broken links are listed, so placing them reports an error.
+    # Returns (path, relative) for every file, the folders holding them and the
+    # passthrough folders, relative paths using "/".
+    exclude_globs = _split_globs(exclude)
+    include_globs = _split_globs(include)
+    passthrough_globs = _split_globs(passthrough)
+    files: list[tuple[str, str]] = []
+    folders: list[str] = []
+    passthrough_folders: list[str] = []
+    pending = [(os.path.join(source_root, start) if start else source_root, start)]
+
+    while pending:
+        folder, relative_folder = pending.pop()
+        has_files = False
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    name = entry.name
+                    relative = f"{relative_folder}/{name}" if relative_folder else name
+                    if _hit(name, relative, exclude_globs):
+                        continue
+                    if entry.is_dir():
+                        if entry.is_symlink():
+                            continue
+                        if _hit(name, relative, passthrough_globs):
+                            passthrough_folders.append(relative)
+                        else:
+                            pending.append((entry.path, relative))
+                    elif entry.is_file() or entry.is_symlink():
+                        if include and not _hit(name, relative, include_globs):
+                            continue
+                        files.append((entry.path, relative))
+                        has_files = True
+        except OSError:
+            continue
+        if has_files:
+            folders.append(relative_folder)
+
+    files.sort(key=lambda item: item[1])
+    passthrough_folders.sort()
+    return files, folders, passthrough_folders
+
+
+def create_folders(destination_root: str, folders) -> None:
+    # A folder an earlier run placed as a passthrough symlink has to become a real folder
+    # again before files are written into it, or the writes would land in the source.
+    ready = {""}
+    for relative in sorted(folders):
+        if relative in ready:
+            continue
+        parts = relative.split("/")
+        for index in range(len(parts)):
+            prefix = "/".join(parts[: index + 1])
+            if prefix not in ready:
+                path = os.path.join(destination_root, prefix)
+                if os.path.islink(path):
+                    os.unlink(path)
+                ready.add(prefix)
+        os.makedirs(os.path.join(destination_root, relative), exist_ok=True)
@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+from src.core.converter import REVIEW_HINT_LIMIT, process_folder, sync_paths
+from src.core.linking import LINK_COPY
+from src.core.profiles import PROFILE_GENERIC
+from src.core.walk import DEFAULT_EXCLUDES, matches_any, scan_tree
+
+WATCH_DEBOUNCE = 0.05
+# The polling fallback rescans the whole source tree each interval; keep it well above
+# the debounce so a large tree does not keep a core busy.
+WATCH_POLL_INTERVAL = 1.0
+
+
+def _snapshot(root: Path, exclude) -> dict[str, tuple[int, int]]:
+    files = {}
+    for path, relative in scan_tree(str(root), exclude)[0]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        files[relative] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def _poll_batches(root: Path, stop_event, debounce: float, interval: float, exclude):
+    # Fallback when watchfiles is not installed: compare (mtime, size) snapshots and
+    # hand over a batch once a poll comes back with no further changes.
+    previous = _snapshot(root, exclude)
+    pending: set[str] = set()
+    quiet_since = None
+    while not stop_event.is_set():
+        stop_event.wait(interval)
+        current = _snapshot(root, exclude)
+        changed = {
+            relative for relative, state in current.items() if previous.get(relative) != state
+        }
+        changed.update(set(previous) - set(current))
+        previous = current
+
+        now = time.monotonic()
+        if changed:
+            pending.update(changed)
+            quiet_since = now
+        elif pending and now - quiet_since >= debounce:
+            yield pending
+            pending = set()
+
+
+def _watchfiles_batches(root: Path, stop_event, debounce: float, exclude):
+    from watchfiles import watch
+
+    resolved = root.resolve()
+    for changes in watch(
+        resolved,
+        debounce=int(debounce * 1000),
+        step=10,
+        stop_event=stop_event,
+        raise_interrupt=False,
+    ):
+        batch = set()
+        for _, path in changes:
+            try:
+                relative = Path(path).relative_to(resolved)
+            except ValueError:
+                continue
+            if relative.parts and not matches_any(relative.as_posix(), exclude):
+                batch.add(relative.as_posix())
+        if batch:
+            yield batch
+
+
+def _change_batches(root: Path, stop_event, debounce: float, exclude, poll_interval: float):
+    try:
+        import watchfiles  # noqa: F401
+    except ImportError:
+        return _poll_batches(root, stop_event, debounce, poll_interval, exclude)
+    return _watchfiles_batches(root, stop_event, debounce, exclude)
+
+
+def _merge_stats(total: dict[str, object], batch: dict[str, object]) -> None:
+    for key, value in batch.items():
+        if key == "review_hints":
+            total[key].extend(value[: REVIEW_HINT_LIMIT - len(total[key])])
+        elif isinstance(value, int) and not isinstance(value, bool):
+            total[key] += value
+
+
+def watch_folder(
+    source_folder: str,
+    destination_folder: str,
+    patterns: list[tuple[str, str]],
+    direction: str,
+    profile: str = PROFILE_GENERIC,
+    callback=None,
+    stop_event=None,
+    parallel: bool = False,
+    link_mode: str = LINK_COPY,
+    debounce: float = WATCH_DEBOUNCE,
+    exclude=DEFAULT_EXCLUDES,
+    include=(),
+    passthrough=(),
+    report=None,
+    poll_interval: float = WATCH_POLL_INTERVAL,
+) -> dict[str, object]:
+    # One incremental pass brings the output up to date, then each debounced burst of
+    # saves is synced on its own. Runs until stop_event is set or Ctrl+C. report gets a
+    # record for every file converted along the way. poll_interval only applies when
+    # watchfiles is not installed.
+    stop_event = stop_event or threading.Event()
+    stats = process_folder(
+        source_folder,
+        destination_folder,
+        patterns,
+        direction,
+        profile,
+        callback,
+        parallel=parallel,
+        incremental=True,
+        link_mode=link_mode,
+        exclude=exclude,
+        include=include,
+        passthrough=passthrough,
+        report=report,
+    )
+    stats["rebuilds"] = 0
+    if callback:
+        callback(f"Watching {source_folder} for changes...")
+
+    try:
+        for batch in _change_batches(
+            Path(source_folder), stop_event, debounce, exclude, poll_interval
+        ):
+            start = time.perf_counter()
+            batch_stats = sync_paths(
+                source_folder,
+                destination_folder,
+                batch,
+                patterns,
+                direction,
+                profile,
+                callback,
+                link_mode,
+                exclude,
+                include,
+                passthrough,
+                report,
+            )
+            _merge_stats(stats, batch_stats)
+            stats["rebuilds"] += 1
+            if callback:
+                elapsed = (time.perf_counter() - start) * 1000
+                callback(f"Synced {len(batch)} path(s) in {elapsed:.1f} ms")
+    except KeyboardInterrupt:
+        pass
+    return stats
@@ -1,14 +1,55 @@
-import html
+import os
+import time
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 
-from nicegui import ui
+from nicegui import background_tasks, run, ui
 
+from src.core.linking import LINK_MODES
 from src.core.profiles import PROFILES
 
+CONSOLE_MAX_LINES = 500
+CONSOLE_FLUSH_INTERVAL = 0.1
+
+LISTING_TTL = 10.0
+LISTING_CACHE_SIZE = 64
+SEARCH_DEBOUNCE_MS = 200
+
+# Folder listings shared by every picker dialog: path -> (listed at, folders).
+_LISTING_CACHE: dict[str, tuple[float, list[dict[str, str]]]] = {}
+
+
+def _list_folders(path: str) -> list[dict[str, str]]:
+    # DirEntry.is_dir() answers from the directory listing on most platforms, so a large
+    # folder or a network share costs one listing instead of a stat per entry.
+    folders = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    folders.append({"name": entry.name, "path": entry.path})
+            except OSError:
+                continue
+    folders.sort(key=lambda row: row["name"].lower())
+    return folders
+
+
+async def _cached_folders(path: str) -> list[dict[str, str]]:
+    cached = _LISTING_CACHE.get(path)
+    if cached is not None and time.monotonic() - cached[0] < LISTING_TTL:
+        return cached[1]
+    folders = await run.io_bound(_list_folders, path)
+    _LISTING_CACHE.pop(path, None)
+    _LISTING_CACHE[path] = (time.monotonic(), folders)
+    while len(_LISTING_CACHE) > LISTING_CACHE_SIZE:
+        _LISTING_CACHE.pop(next(iter(_LISTING_CACHE)))
+    return folders
+
 
 async def _pick_directory(start_path: str) -> str | None:
     current = Path(start_path).expanduser().resolve()
+    folders: list[dict[str, str]] = []
 
     with ui.dialog() as dialog, ui.card().classes(
         "w-[46rem] max-w-[95vw] h-[34rem] max-h-[85vh] p-0 overflow-hidden"
@@ -22,12 +63,32 @@ async def _pick_directory(start_path: str) -> str | None:
                 current_label = ui.label().classes("text-xs uppercase tracking-wide text-slate-500 break-all")
                 search_input = ui.input(
                     placeholder="Search folders in this directory...",
-                    on_change=lambda _: render(),
+                    on_change=lambda _: show(),
                 ).classes("w-full")
-                search_input.props("outlined dense clearable prepend-icon=search")
+                # Quasar holds the value back until typing pauses, so a burst of keystrokes
+                # filters the cached listing once.
+                search_input.props(
+                    f"outlined dense clearable prepend-icon=search debounce={SEARCH_DEBOUNCE_MS}"
+                )
                 error_label = ui.label().classes("text-sm text-red-600 min-h-[1.2rem]")
-                with ui.scroll_area().classes("w-full flex-1 min-h-0 bg-slate-50 rounded-xl border border-slate-200"):
-                    list_container = ui.column().classes("w-full gap-1 p-2")
+                up_button = ui.button(
+                    "..", icon="arrow_upward", on_click=lambda: open_folder(current.parent)
+                ).props("flat no-caps align=left").classes("w-full justify-start")
+                # Virtual scroll keeps only the rows in view in the DOM, however large the
+                # folder is.
+                folder_table = ui.table(
+                    columns=[{"name": "name", "label": "Folder", "field": "name", "align": "left"}],
+                    rows=[],
+                    row_key="path",
+                    pagination=0,
+                ).classes("w-full flex-1 min-h-0 bg-slate-50 rounded-xl border border-slate-200")
+                folder_table.props(
+                    'virtual-scroll flat dense hide-header hide-bottom '
+                    'no-data-label="No matching folders found."'
+                )
+                folder_table.on(
+                    "rowClick", lambda event: open_folder(Path(event.args[1]["path"]))
+                )
 
             with ui.row().classes("w-full justify-end gap-2 px-5 py-4 border-t border-slate-200"):
                 ui.button("Cancel", on_click=lambda: dialog.submit(None)).props("flat")
@@ -35,55 +96,40 @@ async def _pick_directory(start_path: str) -> str | None:
                     "app-btn app-btn-primary"
                 )
 
-    def open_folder(path: Path) -> None:
-        nonlocal current
+    def show() -> None:
+        query = (search_input.value or "").strip().lower()
+        visible = folders
+        if query:
+            visible = [row for row in folders if query in row["name"].lower()]
+        folder_table.rows[:] = visible
+        folder_table.update()
+
+    async def open_folder(path: Path) -> None:
+        nonlocal current, folders
         try:
-            current = path.expanduser().resolve()
-            search_input.value = ""
-            search_input.update()
-            render()
+            target = path.expanduser().resolve()
         except OSError as exc:
             error_label.text = f"Could not open folder: {exc}"
-            error_label.update()
-
-    def render() -> None:
+            return
+        current = target
         current_label.text = f"Current: {current}"
-        current_label.update()
+        up_button.set_visibility(current.parent != current)
         error_label.text = ""
-        error_label.update()
-        list_container.clear()
-        with list_container:
-            if current.parent != current:
-                ui.button("..", icon="arrow_upward", on_click=lambda: open_folder(current.parent)).props(
-                    "flat no-caps align=left"
-                ).classes("w-full justify-start")
-
-            try:
-                folders = sorted(
-                    [item for item in current.iterdir() if item.is_dir()],
-                    key=lambda item: item.name.lower(),
-                )
-            except OSError as exc:
+        search_input.value = ""
+        try:
+            listing = await _cached_folders(str(target))
+        except OSError as exc:
+            listing = []
+            if current == target:
                 error_label.text = f"Could not list folder: {exc}"
-                error_label.update()
-                folders = []
-
-            query = (search_input.value or "").strip().lower()
-            visible_folders = folders
-            if query:
-                visible_folders = [folder for folder in folders if query in folder.name.lower()]
-
-            if not visible_folders:
-                ui.label("No matching folders found.").classes("text-sm text-slate-500 p-2")
-
-            for folder in visible_folders:
-                ui.button(
-                    folder.name,
-                    icon="folder",
-                    on_click=lambda target=folder: open_folder(target),
-                ).props("flat no-caps align=left").classes("w-full justify-start")
+        if current != target:
+            # Another folder was opened while this one was still being listed.
+            return
+        folders = listing
+        show()
 
-    render()
+    # The dialog opens straight away; the first listing fills in once it arrives.
+    background_tasks.create(open_folder(current))
     return await dialog
 
 
@@ -132,11 +178,55 @@ def create_conversion_options():
             with_input=False,
         ).classes("w-full")
         profile.props("outlined")
-    return direction, profile
+
+        ui.label("Unchanged Files").classes("text-sm font-semibold text-slate-700 mt-2")
+        ui.label(
+            "Assets and files that need no rewrite can be linked instead of copied "
+            "(falls back to a copy when linking fails)."
+        ).classes("text-sm text-slate-500 mb-1")
+        link_mode = ui.select(
+            options=LINK_MODES,
+            value=LINK_MODES[0],
+            with_input=False,
+        ).classes("w-full")
+        link_mode.props("outlined")
+
+        parallel = ui.switch("Use all CPU cores", value=False).classes("mt-2")
+        ui.label("Converts files in worker processes; useful for large server trees.").classes(
+            "text-sm text-slate-500"
+        )
+
+        incremental = ui.switch("Incremental (reuse previous output)", value=False)
+        ui.label(
+            "Keeps one output folder per direction and only reconverts changed files."
+        ).classes("text-sm text-slate-500")
+
+        timings = ui.switch("Record stage timings", value=False)
+        ui.label("Adds per-stage wall time and bytes (p50/p95/max) to the summary.").classes(
+            "text-sm text-slate-500"
+        )
+
+        dry_run = ui.switch("Dry run (write nothing)", value=False)
+        ui.label("Converts in memory and only reports what would change.").classes(
+            "text-sm text-slate-500"
+        )
+
+    run_options = {
+        "link_mode": link_mode,
+        "parallel": parallel,
+        "incremental": incremental,
+        "timings": timings,
+        "dry_run": dry_run,
+    }
+    return direction, profile, run_options
 
 
 def create_output_console():
-    messages: list[str] = []
+    # Full log stays on the server for download; the browser only receives new lines,
+    # batched per timer tick, and keeps the newest CONSOLE_MAX_LINES rows in the DOM.
+    log_lines: list[str] = []
+    pending: list[tuple[str, str]] = []
+    rendered: deque = deque()
 
     with ui.card().classes("w-full app-panel"):
         ui.label("Live Output").classes("text-lg font-semibold text-slate-900")
@@ -144,14 +234,22 @@ def create_output_console():
             "h-72 w-full border border-slate-200 rounded-xl p-3 bg-slate-950"
         )
         with scroll:
-            output_html = ui.html().classes("font-mono text-sm whitespace-pre-wrap leading-6")
+            output = ui.column().classes("font-mono text-sm whitespace-pre-wrap leading-6 gap-0")
 
-        with ui.row().classes("w-full justify-end mt-2"):
+        with ui.row().classes("w-full items-center justify-end gap-2 mt-2"):
+            status_label = ui.label().classes("text-xs text-slate-500 mr-auto")
+
+            def download():
+                ui.download("\n".join(log_lines).encode("utf-8"), "conversion.log")
 
             def clear():
-                messages.clear()
-                output_html.content = ""
+                log_lines.clear()
+                pending.clear()
+                rendered.clear()
+                output.clear()
+                status_label.text = ""
 
+            ui.button("Download log", icon="download", on_click=download).props("flat")
             ui.button("Clear", icon="ink_eraser", on_click=clear).classes("app-btn app-btn-danger")
 
     color_map = {
@@ -161,12 +259,30 @@ def create_output_console():
         "warning": "text-amber-300",
     }
 
+    def flush():
+        if not pending:
+            return
+        batch = pending[-CONSOLE_MAX_LINES:]
+        pending.clear()
+        with output:
+            for css, line in batch:
+                rendered.append(ui.label(line).classes(css))
+        while len(rendered) > CONSOLE_MAX_LINES:
+            output.remove(rendered.popleft())
+        if len(log_lines) > CONSOLE_MAX_LINES:
+            status_label.text = (
+                f"Showing last {CONSOLE_MAX_LINES} of {len(log_lines)} lines; "
+                "download for the full log."
+            )
+        scroll.scroll_to(percent=1.0)
+
+    ui.timer(CONSOLE_FLUSH_INTERVAL, flush)
+
     def add_message(text: str, level: str = "info"):
         css = color_map.get(level, color_map["info"])
         ts = datetime.now().strftime("%H:%M:%S")
-        safe = html.escape(text)
-        messages.append(f'<div class="{css}">[{ts}] {safe}</div>')
-        output_html.content = "\n".join(messages)
-        scroll.scroll_to(percent=1.0)
+        line = f"[{ts}] {text}"
+        log_lines.append(line)
+        pending.append((css, line))
 
     return add_message, clear